@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import NamedTuple, List, Any
+
+logger = logging.getLogger("AlertAggregator")
+
+# ---------------- SETTING ----------------
+AGG_WINDOW = 10         # detik, jendela pengelompokan per (OLT, PON, kategori)
+AGG_THRESHOLD = 3       # alert tunggal per jendela, sisanya masuk digest
+
+
+class Digest(NamedTuple):
+    olt: str
+    pon: int
+    category: str
+    events: List[Any]       # LogRecord yang ditahan
+    sent_single: int        # jumlah alert tunggal yang sudah terkirim di jendela ini
+
+
+class AlertAggregator:
+    """Kelompokkan alert per (OLT, PON, kategori), saat storm kirim satu digest"""
+
+    def __init__(self, window=AGG_WINDOW, threshold=AGG_THRESHOLD):
+        self.window = window
+        self.threshold = threshold
+        self.stats = defaultdict(int)
+        self._groups = {}
+        self._tasks = set()
+
+    async def run(self, in_queue, out_queue):
+        """Stage agregasi: alert tunggal diteruskan langsung, kelebihan ditahan untuk digest"""
+        while True:
+            received_at, data_log, category, catchup, tokens = await in_queue.get()
+            try:
+                if self.add(data_log, category, received_at, out_queue, digest_only=catchup, tokens=tokens):
+                    self.stats["single"] += 1
+                    await out_queue.put((received_at, data_log, category, tokens))
+                else:
+                    self.stats["held"] += 1
+            finally:
+                in_queue.task_done()
+
+    def add(self, data_log, category, received_at, out_queue, digest_only=False, tokens=()):
+        """
+        True jika alert dikirim tunggal, False jika ditahan untuk digest.
+        digest_only (backlog setelah restart) langsung ditahan untuk digest.
+        tokens alert yang ditahan ikut dibawa digest agar checkpoint menunggu digest terkirim.
+        """
+        key = (data_log.olt, data_log.pon, category)
+        group = self._groups.get(key)
+        if group is None:
+            group = {"count": 0, "held": [], "tokens": [], "received_at": received_at}
+            self._groups[key] = group
+            task = asyncio.create_task(self._close_later(key, out_queue))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if not digest_only:
+            group["count"] += 1
+            if group["count"] <= self.threshold:
+                return True
+
+        if not group["held"]:
+            group["received_at"] = received_at
+        group["held"].append(data_log)
+        group["tokens"].extend(tokens)
+        return False
+
+    async def _close_later(self, key, out_queue):
+        await asyncio.sleep(self.window)
+        group = self._groups.pop(key, None)
+        if not group or not group["held"]:
+            return
+
+        await self._emit(key, group, out_queue)
+
+    async def _emit(self, key, group, out_queue):
+        olt, pon, category = key
+        digest = Digest(olt, pon, category, group["held"], min(group["count"], self.threshold))
+        self.stats["digests"] += 1
+        logger.info(f"Digest {category} {olt} PON {pon}: {len(digest.events)} ONU")
+        await out_queue.put((group["received_at"], digest, category, tuple(group["tokens"])))
+
+    def pending(self):
+        """Jumlah jendela (OLT, PON, kategori) yang masih terbuka"""
+        return len(self._groups)
+
+    async def flush(self, out_queue):
+        """Kirim semua digest yang masih terbuka tanpa menunggu jendela (dipakai saat shutdown)"""
+        for task in list(self._tasks):
+            task.cancel()
+        for key in list(self._groups):
+            group = self._groups.pop(key)
+            if group["held"]:
+                await self._emit(key, group, out_queue)
@@ -1,8 +1,53 @@
-from flask import Flask
+import os
+import sys
+import time
+from flask import Flask, Response, g, request
+
+# modul bersama (db_pool, dll) ada di root repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_setup import setup_logging
+import metrics
 from routes.onu import onu_bp   # import blueprint
 
+try:
+    from waitress import serve
+    HAS_WAITRESS = True
+except ImportError:
+    HAS_WAITRESS = False
+
+# ---------------- SETTING ----------------
+API_HOST = "0.0.0.0"
+API_PORT = 5000
+API_THREADS = 8     # request dilayani paralel, scrape OLT yang sama tetap satu
+
+REQUEST_SECONDS = metrics.histogram("olt_api_request_seconds", "Durasi request API", ("endpoint", "status"))
+
 app = Flask(__name__)
 app.register_blueprint(onu_bp, url_prefix="/onu")  # aktifkan route /onu
 
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    if request.endpoint != "metrics_endpoint" and "started" in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.started,
+                                endpoint=request.endpoint or "unknown", status=response.status_code)
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    setup_logging()
+    if HAS_WAITRESS:
+        serve(app, host=API_HOST, port=API_PORT, threads=API_THREADS)
+    else:
+        # fallback tanpa waitress: server bawaan Flask, multi-thread tanpa debug
+        app.run(host=API_HOST, port=API_PORT, threaded=True, debug=False)
@@ -1,13 +1,33 @@
 import time
-import hashlib
 from flask import Blueprint, jsonify, request
-import requests, base64, logging
+import logging
 from typing import Dict, Any
 import re
+import pymysql
+from db_pool import get_pool
+from olt_client import get_client, OLTAuthError, OLTConnectionError
+from snapshot_cache import SnapshotCache
+import metrics
 
 onu_bp = Blueprint("onu", __name__)
 logger = logging.getLogger(__name__)
 
+DB_CONFIG = {
+    "host": "127.0.0.1",
+    "user": "",
+    "password": "",
+    "database": "db_mng_olt",
+    "autocommit": True,
+    "cursorclass": pymysql.cursors.DictCursor
+}
+DB = get_pool(DB_CONFIG, size=4)
+
+# Hasil scrape per OLT dipakai bersama selama SNAPSHOT_TTL detik, request
+# bersamaan untuk OLT yang sama menunggu satu scrape (single-flight).
+# Key memuat kredensial agar password salah tidak ikut mendapat data cache.
+SNAPSHOT_CACHE = SnapshotCache()
+metrics.register_stats("olt_api_snapshot_cache", "Hit / load / coalesced cache scrape OLT", lambda: SNAPSHOT_CACHE.stats)
+
 
 def validate_ip(ip: str) -> bool:
     ip_pattern = r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$'
@@ -20,72 +40,6 @@ def validate_ip(ip: str) -> bool:
             return False
     return True
 
-def safe_json(resp: requests.Response) -> Dict[str, Any]:
-    """Safely parse JSON response with error handling"""
-    try:
-        if resp.status_code != 200:
-            return {
-                "error": f"HTTP Error {resp.status_code}",
-                "status_code": resp.status_code,
-                "text": resp.text[:200]
-            }
-        return resp.json()
-    except ValueError as e:
-        return {"error": f"JSON Parse Error: {str(e)}", "raw": resp.text[:200], "status_code": resp.status_code}
-    except Exception as e:
-        return {"error": f"Unexpected Error: {str(e)}", "status_code": resp.status_code}
-
-class OLTAuthError(Exception):
-    pass
-
-class OLTConnectionError(Exception):
-    pass
-
-def olt_login(olt_ip: str, username: str, password: str) -> Dict[str, Any]:
-    """Handle OLT login and return headers"""
-    try:
-
-        password_b64 = base64.b64encode(password.encode()).decode()
-
-
-        raw_key = f"{username}:{password}"
-        key = hashlib.md5(raw_key.encode()).hexdigest()
-
-        login_url = f"http://{olt_ip}/userlogin?form=login"
-        payload = {
-            "method": "set",
-            "param": {
-                "name": username,
-                "key": key,
-                "value": password_b64,
-                "captcha_v": "",
-                "captcha_f": ""
-            }
-        }
-
-        resp = requests.post(login_url, json=payload, timeout=10)
-        login_data = safe_json(resp)
-
-        if login_data.get("code") != 1:
-            raise OLTAuthError(f"Login failed: {login_data.get('message', 'Unknown error')}")
-
-        x_token = resp.headers.get("X-Token")
-        if not x_token:
-            raise OLTAuthError("No X-Token received in login response")
-
-        return {
-            "x_token": x_token,
-            "headers": {"X-Token": x_token},
-            "login_data": login_data
-        }
-
-    except requests.exceptions.Timeout:
-        raise OLTConnectionError("Login timeout - OLT not responding")
-    except requests.exceptions.ConnectionError:
-        raise OLTConnectionError("Connection failed - check OLT IP address")
-    except requests.exceptions.RequestException as e:
-        raise OLTConnectionError(f"Network error: {str(e)}")
-
 def olt_get_data(olt_ip: str, username: str, password: str) -> Dict[str, Any]:
     """Main function to retrieve OLT data"""
     try:
@@ -94,63 +48,27 @@ def olt_get_data(olt_ip: str, username: str, password: str) -> Dict[str, Any]:
             return {"error": "Invalid IP address format"}
         
 
-        auth_data = olt_login(olt_ip, username, password)
-        headers = auth_data["headers"]
+        # client per OLT dipakai ulang antar request (keep-alive + X-Token cache)
+        client = get_client(olt_ip, username, password)
+        snapshot = client.fetch_snapshot()
         
         result = {
-            "login": auth_data["login_data"],
-            "x_token": auth_data["x_token"],
-            "system": {},
-            "board": {},
+            "login": client.login_data,
+            "x_token": client.token,
+            "system": snapshot["system"],
+            "board": snapshot["board"],
             "onus": [],
             "total_onus": 0,
+            "timings": snapshot["timings"],
             "success": True
         }
 
-
-        try:
-            system_url = f"http://{olt_ip}/system?form=hostname"
-            system_resp = requests.get(system_url, headers=headers, timeout=10)
-            result["system"] = safe_json(system_resp)
-        except Exception as e:
-            logger.warning(f"Failed to get system info: {str(e)}")
-            result["system"] = {"error": str(e)}
-
-
-        try:
-            board_url = f"http://{olt_ip}/board?info=pon"
-            board_resp = requests.get(board_url, headers=headers, timeout=10)
-            board_data = safe_json(board_resp)
-            result["board"] = board_data
-            
-
-            if "data" in board_data:
-                pon_ports = [p["port_id"] for p in board_data.get("data", [])]
-                for pid in pon_ports:
-                    try:
-                        ts = int(time.time() * 1000)
-                        allow_url = f"http://{olt_ip}/onu_allow_list?t={ts}"
-                        requests.get(allow_url, headers=headers, timeout=5)
-                    except Exception:
-                        continue  # Skip if one port fails
-        except Exception as e:
-            logger.warning(f"Failed to get board info: {str(e)}")
-            result["board"] = {"error": str(e)}
-
-        # Get ONU data
-        try:
-            onu_url = f"http://{olt_ip}/onutable"
-            onu_resp = requests.get(onu_url, headers=headers, timeout=15)
-            onu_data = safe_json(onu_resp)
-            
-            if "data" in onu_data:
-                result["onus"] = onu_data["data"]
-                result["total_onus"] = len(onu_data["data"])
-            else:
-                result["onus"] = onu_data
-        except Exception as e:
-            logger.error(f"Failed to get ONU data: {str(e)}")
-            result["onus"] = {"error": str(e)}
+        onu_data = snapshot["onutable"]
+        if "data" in onu_data:
+            result["onus"] = onu_data["data"]
+            result["total_onus"] = len(onu_data["data"])
+        else:
+            result["onus"] = onu_data
 
         return result
 
@@ -167,7 +85,7 @@ def get_onu_list():
     olt_ip = request.args.get("ip")
     username = request.args.get("username", "root")
     password = request.args.get("password", "")
-    
+    fresh = request.args.get("fresh") == "1"
 
     logger.info(f"Request received for OLT: {olt_ip}, user: {username}")
 
@@ -177,8 +95,15 @@ def get_onu_list():
             "success": False
         }), 400
 
-    result = olt_get_data(olt_ip, username, password)
-    
+    result, age = SNAPSHOT_CACHE.get(
+        (olt_ip, username, password),
+        lambda: olt_get_data(olt_ip, username, password),
+        fresh=fresh,
+        cache_if=lambda r: r.get("success")
+    )
+    if age is None:
+        SNAPSHOT_CACHE.purge()
+    result = {**result, "cache": {"hit": age is not None, "age": round(age, 1) if age is not None else 0}}
 
     if result.get("success"):
         logger.info(f"Successfully retrieved {result.get('total_onus', 0)} ONUs from {olt_ip}")
@@ -187,11 +112,36 @@ def get_onu_list():
     
     return jsonify(result)
 
+@onu_bp.route("/current", methods=["GET"])
+def get_onu_current():
+    """State terakhir ONU dari onu_current (tanpa scan onu_log / login OLT)"""
+    mac = request.args.get("mac")
+    olt_id = request.args.get("olt_id", type=int)
+
+    if not mac and olt_id is None:
+        return jsonify({
+            "error": "Parameter mac atau olt_id wajib",
+            "success": False
+        }), 400
+
+    try:
+        if mac:
+            rows = DB.fetchall("SELECT * FROM onu_current WHERE macaddr = %s", (mac,))
+        else:
+            rows = DB.fetchall("SELECT * FROM onu_current WHERE olt_id = %s ORDER BY port_id, onu_id", (olt_id,))
+    except Exception as e:
+        logger.error(f"Failed to read onu_current: {e}")
+        return jsonify({"error": str(e), "success": False}), 500
+
+    return jsonify({"onus": rows, "total_onus": len(rows), "success": True})
+
 @onu_bp.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
+    db_ok = DB.ping()
     return jsonify({
-        "status": "healthy",
+        "status": "healthy" if db_ok else "degraded",
         "service": "ONU Data Collector",
+        "database": "ok" if db_ok else "error",
         "timestamp": time.time()
     })
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+
+# modul collector ada di root repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from onu_cronjob import fetch_olt, COLLECTOR_WORKERS
+from fake_olt import FakeOLT
+from bench_common import latency_summary, write_report
+
+
+def run_cycle(olts, workers):
+    """Satu siklus fetch semua OLT seperti collect_all (tanpa insert DB)"""
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fetch_olt, olts))
+    return time.monotonic() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark collector onu_cronjob terhadap OLT palsu lokal")
+    parser.add_argument("--olts", type=int, default=4)
+    parser.add_argument("--onus", type=int, default=1024, help="ONU per OLT")
+    parser.add_argument("--pons", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="detik per request HTTP")
+    parser.add_argument("--onutable-latency", type=float, default=0.2, help="detik tambahan /onutable")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=COLLECTOR_WORKERS)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    fakes = [
+        FakeOLT(onus=args.onus, pons=args.pons, latency=args.latency,
+                onutable_latency=args.onutable_latency, hostname=f"FAKE-OLT-{i + 1}", seed=i + 1).start()
+        for i in range(args.olts)
+    ]
+    olts = [
+        {"id": i + 1, "ip": fake.address, "username": "root", "password": "bench"}
+        for i, fake in enumerate(fakes)
+    ]
+
+    try:
+        cycle_times = []
+        step_times = defaultdict(list)
+        errors = 0
+        onus = 0
+        for cycle in range(args.cycles):
+            elapsed, results = run_cycle(olts, args.workers)
+            cycle_times.append(elapsed)
+            for result in results:
+                if result["error"]:
+                    errors += 1
+                    print(f"  {result['olt']['ip']}: {result['error']}")
+                onus += len(result["onus"])
+                for step, value in result["timings"].items():
+                    step_times[step].append(value)
+            print(f"Siklus {cycle + 1}: {elapsed:.3f} detik")
+    finally:
+        http_requests = sum(sum(fake.stats.values()) for fake in fakes)
+        for fake in fakes:
+            fake.stop()
+
+    results = {
+        "cycle_time": latency_summary(cycle_times),
+        "steps": {step: latency_summary(values) for step, values in step_times.items()},
+        "onus_per_second": onus / sum(cycle_times) if cycle_times else 0,
+        "http_requests": http_requests,
+        "errors": errors,
+    }
+
+    print(f"OLT {args.olts} x {args.onus} ONU, {args.cycles} siklus, {args.workers} worker")
+    print(f"  cycle time p50 : {results['cycle_time']['p50']:.3f} detik")
+    print(f"  ONU/detik      : {results['onus_per_second']:,.0f}")
+    for step, summary in results["steps"].items():
+        print(f"  {step:<15}: p50 {summary['p50']:.3f} detik")
+    print(f"  HTTP request   : {http_requests}, error {errors}")
+
+    if args.json:
+        write_report(args.json, "collector", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
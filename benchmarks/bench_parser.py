@@ -0,0 +1,108 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# modul bot ada di root repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from log_parser import parse_log_line
+from bench_common import write_report
+
+
+# parser lama (regex string + 2x re.search per baris) sebagai pembanding
+LEGACY_PATTERN = (
+    r'^(\w+\s+\d+\s+\d+:\d+:\d+)\s+'
+    r'(\S+)\s+'
+    r'([^:]+):\s+'
+    r'\[[^\]]+\]\s+'
+    r'Info:\s+'
+    r'(ONU\s+\d+/\d+(?:\s+Port\s+\d+)?\s+[0-9a-f:]+)\s+'
+    r'(.*)$'
+)
+
+def legacy_parse(line):
+    match = re.match(LEGACY_PATTERN, line)
+    if not match:
+        return None
+    waktu, gateway_or_ip, olt_name, onu_info, status = match.groups()
+    mac_match = re.search(r'([0-9a-f:]{17})', onu_info)
+    pon_slot_match = re.search(r'ONU\s+(\d+)/(\d+)', onu_info)
+    return {
+        'waktu_server': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'mac': mac_match.group(1) if mac_match else None,
+        'pon': int(pon_slot_match.group(1)) if pon_slot_match else None,
+        'slot': int(pon_slot_match.group(2)) if pon_slot_match else None,
+        'status': status.strip(),
+    }
+
+
+def synthetic_lines(count, onu_ratio=0.3, seed=1):
+    """Sampel /var/log/olt.log buatan: campuran log status ONU dan syslog lain"""
+    rnd = random.Random(seed)
+    statuses = ["Dying gasp", "Link up", "Laser out", "Only CTC lost", "Manual reboot"]
+    noise = [
+        "Jan  2 19:46:01 10.10.10.1 OLT-A: [SYSTEM] Notice: user root login from 10.0.0.5",
+        "Jan  2 19:46:01 10.10.10.1 OLT-A: [EPON] Warning: PON 3 optical power high",
+        "Jan  2 19:46:02 10.10.10.2 kernel: eth0 link state changed",
+    ]
+    lines = []
+    for _ in range(count):
+        if rnd.random() < onu_ratio:
+            mac = ":".join(f"{rnd.randrange(256):02x}" for _ in range(6))
+            lines.append(
+                f"Jan  2 19:46:01 10.10.10.1 OLT-A: [EPON] Info: ONU {rnd.randint(1, 16)}/{rnd.randint(1, 64)} "
+                f"{mac} {rnd.choice(statuses)}\n"
+            )
+        else:
+            lines.append(rnd.choice(noise) + "\n")
+    return lines
+
+
+def bench(func, lines, repeat):
+    best = None
+    matched = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matched = sum(1 for line in lines if func(line) is not None)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(lines) / best, matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark parse_log_line")
+    parser.add_argument("logfile", nargs="?", help="sampel log (default: sampel sintetis)")
+    parser.add_argument("--lines", type=int, default=200000, help="jumlah baris sintetis")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    if args.logfile:
+        with open(args.logfile, errors="replace") as f:
+            lines = f.readlines()
+        source = args.logfile
+    else:
+        lines = synthetic_lines(args.lines)
+        source = "synthetic"
+
+    print(f"Sampel: {source}, {len(lines)} baris, best of {args.repeat}")
+    legacy_rate, legacy_matched = bench(legacy_parse, lines, args.repeat)
+    new_rate, new_matched = bench(parse_log_line, lines, args.repeat)
+    print(f"  legacy parse : {legacy_rate:12,.0f} lines/s ({legacy_matched} match)")
+    print(f"  log_parser   : {new_rate:12,.0f} lines/s ({new_matched} match)")
+    print(f"  speedup      : {new_rate / legacy_rate:.2f}x")
+
+    if args.json:
+        write_report(args.json, "parser", vars(args), {
+            "legacy_lines_per_second": legacy_rate,
+            "lines_per_second": new_rate,
+            "matched": new_matched,
+        })
+
+
+if __name__ == "__main__":
+    main()
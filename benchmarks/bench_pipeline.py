@@ -0,0 +1,279 @@
+import os
+import re
+import sys
+import time
+import bisect
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import defaultdict
+
+# modul bot ada di root repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot_olt
+import telegram_dispatcher
+from telegram import Bot
+from log_parser import parse_log_line
+from olt_log_writer import OltLogWriter
+from state_tracker import OnuStateTracker
+from alert_aggregator import AlertAggregator
+from log_follower import LineTracker
+from telegram_dispatcher import TelegramDispatcher
+from fake_telegram import FakeTelegram
+from bench_common import latency_summary, write_report
+
+MAC_PATTERN = re.compile(r'[0-9a-f]{2}(?::[0-9a-f]{2}){5}')
+
+NOISE = [
+    "Jan  2 19:46:01 {ip} {name}: [SYSTEM] Notice: user root login from 10.0.0.5",
+    "Jan  2 19:46:01 {ip} {name}: [EPON] Warning: PON 3 optical power high",
+    "Jan  2 19:46:02 {ip} kernel: eth0 link state changed",
+]
+STATUSES = ["Link up", "Laser out", "Only CTC lost", "Manual reboot", "Dying gasp"]
+
+
+def onu_population(olts, pons, per_pon):
+    """ONU sintetis: (ip OLT, nama OLT, pon, slot, mac)"""
+    population = []
+    for o in range(olts):
+        for pon in range(1, pons + 1):
+            for slot in range(1, per_pon + 1):
+                mac = "e0:67:b3:" + ":".join(f"{b:02x}" for b in bytes([o, pon, slot]))
+                population.append((f"10.10.10.{o + 1}", f"OLT-{o + 1}", pon, slot, mac))
+    return population
+
+
+def onu_line(onu, status):
+    ip, name, pon, slot, mac = onu
+    return f"Jan  2 19:46:01 {ip} {name}: [EPON] Info: ONU {pon}/{slot} {mac} {status}\n"
+
+
+def replay_lines(count, population, onu_ratio=0.01, storm_every=2500, storm_size=64, seed=1):
+    """
+    Baris /var/log/olt.log sintetis: campuran syslog lain, event ONU acak
+    dan storm mati lampu (storm_size dying gasp di satu PON) tiap storm_every baris.
+    """
+    rnd = random.Random(seed)
+    by_pon = defaultdict(list)
+    for onu in population:
+        by_pon[onu[:3]].append(onu)
+    pons = list(by_pon)
+
+    lines = []
+    while len(lines) < count:
+        if storm_every and storm_size and lines and len(lines) % storm_every == 0:
+            for onu in by_pon[rnd.choice(pons)][:storm_size]:
+                lines.append(onu_line(onu, "Dying gasp"))
+        elif rnd.random() < onu_ratio:
+            lines.append(onu_line(rnd.choice(population), rnd.choice(STATUSES)))
+        else:
+            onu = rnd.choice(population)
+            lines.append(rnd.choice(NOISE).format(ip=onu[0], name=onu[1]) + "\n")
+    return lines[:count]
+
+
+def prepare_bot(population, tmpdir, window):
+    """State bot untuk benchmark: cache ONU terisi, tanpa DB / SNMP / insert olt_logs"""
+    for ip, name, pon, slot, mac in population:
+        bot_olt.ONU_CACHE.put(mac, {"onu_name": f"PELANGGAN-{mac[-8:]}", "receive_power": -20.5})
+        # community kosong: ONU up memakai RX dari cache, bukan GET SNMP
+        bot_olt.SNMP_COMMUNITY_CACHE[ip] = ((None, None), time.monotonic() + 10 ** 9)
+
+    bot_olt.ONU_STATE = OnuStateTracker()
+    bot_olt.AGGREGATOR = AlertAggregator(window=window)
+    bot_olt.LINE_TRACKER = LineTracker()
+    bot_olt.OLT_LOG_WRITER = OltLogWriter(None, max_buffer=10 ** 9)
+    bot_olt.PIPELINE_STATS.clear()
+    bot_olt.PIPELINE_CONFIG.update({
+        'log_file': os.path.join(tmpdir, "olt.log"),
+        'checkpoint_file': os.path.join(tmpdir, "checkpoint.json"),
+        'catchup_summary': False,
+    })
+
+
+# ---------------- STAGE ----------------
+async def bench_stages(lines):
+    """Throughput parse_log_line -> kategori_log -> format_message tanpa antrian"""
+    bot_olt.ONU_STATE = OnuStateTracker()
+
+    started = time.perf_counter()
+    parsed = [record for record in map(parse_log_line, lines) if record is not None and record.mac]
+    parse_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    categorized = [(record, bot_olt.kategori_log(record)) for record in parsed]
+    categorized = [(record, category) for record, category in categorized if category]
+    categorize_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for record, category in categorized:
+        await bot_olt.format_message(record, category)
+    format_time = time.perf_counter() - started
+
+    total = parse_time + categorize_time + format_time
+    return {
+        "parse_lines_per_second": len(lines) / parse_time,
+        "categorize_records_per_second": len(parsed) / categorize_time if categorize_time else None,
+        "format_alerts_per_second": len(categorized) / format_time if format_time else None,
+        "lines_per_second": len(lines) / total,
+        "records": len(parsed),
+        "alerts": len(categorized),
+    }
+
+
+# ---------------- END-TO-END ----------------
+async def replay(path, lines, rate, written):
+    """Tulis baris ke file log dengan laju `rate` baris/detik (0 = secepatnya)"""
+    batch = max(1, int(rate * 0.01)) if rate else 1000
+    interval = batch / rate if rate else 0
+    started = time.monotonic()
+
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(0, len(lines), batch):
+            chunk = lines[i:i + batch]
+            f.write("".join(chunk))
+            f.flush()
+            now = time.monotonic()
+            for line in chunk:
+                match = MAC_PATTERN.search(line)
+                if match and "Info: ONU" in line:
+                    written[match.group(0)].append(now)
+
+            if interval:
+                await asyncio.sleep(max(0, started + (i + batch) / rate - time.monotonic()))
+            else:
+                await asyncio.sleep(0)
+
+
+def alert_latencies(messages, written):
+    """Latency tiap MAC di pesan Telegram terhadap penulisan baris terakhir sebelum pesan diterima"""
+    latencies = []
+    for received_at, _, text in messages:
+        for mac in set(MAC_PATTERN.findall(text)):
+            times = written.get(mac)
+            if not times:
+                continue
+            idx = bisect.bisect_right(times, received_at)
+            if idx:
+                latencies.append(received_at - times[idx - 1])
+    return latencies
+
+
+async def bench_e2e(lines, args, tmpdir):
+    fake = FakeTelegram(latency=args.telegram_latency, flood_every=args.flood_every).start()
+    bot = Bot(token="123456:bench", base_url=fake.base_url)
+    dispatcher = TelegramDispatcher(bot, path=os.path.join(tmpdir, "outbox.db"))
+    await dispatcher.start()
+
+    log_file = bot_olt.PIPELINE_CONFIG['log_file']
+    open(log_file, "w").close()
+    chat_ids = {category: list(range(1000, 1000 + args.chats)) for category in ("mati", "los", "up")}
+
+    queue_size = bot_olt.PIPELINE_CONFIG['queue_size']
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in range(4)]
+    line_queue, parsed_queue, alert_queue, send_queue = queues
+    tasks = [
+        asyncio.create_task(bot_olt.read_stage(line_queue, *bot_olt.open_log())),
+        asyncio.create_task(bot_olt.parse_stage(line_queue, parsed_queue)),
+        asyncio.create_task(bot_olt.categorize_stage(parsed_queue, alert_queue)),
+        asyncio.create_task(bot_olt.AGGREGATOR.run(alert_queue, send_queue)),
+    ]
+    for _ in range(bot_olt.PIPELINE_CONFIG['send_workers']):
+        tasks.append(asyncio.create_task(bot_olt.send_stage(send_queue, dispatcher, chat_ids)))
+
+    # follower mulai dari akhir file, beri waktu membuka file sebelum replay
+    await asyncio.sleep(0.5)
+    written = defaultdict(list)
+    started = time.monotonic()
+    processed_at = None
+    try:
+        await replay(log_file, lines, args.rate, written)
+        deadline = time.monotonic() + args.drain_timeout
+        while time.monotonic() < deadline:
+            if processed_at is None and bot_olt.PIPELINE_STATS['read'] >= len(lines) \
+                    and all(queue.empty() for queue in queues[:3]):
+                processed_at = time.monotonic()
+            if processed_at is not None and send_queue.empty() \
+                    and not bot_olt.AGGREGATOR.pending() and not dispatcher.pending():
+                break
+            await asyncio.sleep(0.01)
+        drained_at = time.monotonic()
+        undelivered = dispatcher.pending()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await dispatcher.close()
+        fake.stop()
+
+    latencies = alert_latencies(fake.messages, written)
+    processed_at = processed_at or drained_at
+    return {
+        "lines_per_second": len(lines) / (processed_at - started),
+        "alert_latency": latency_summary(latencies),
+        "drain_time": drained_at - started,
+        "telegram_messages": len(fake.messages),
+        "telegram_flood_replies": fake.stats["flood"],
+        "undelivered": undelivered,
+        "pipeline": dict(bot_olt.PIPELINE_STATS),
+        "aggregator": dict(bot_olt.AGGREGATOR.stats),
+        "dispatcher": dict(dispatcher.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline bot: replay syslog sampai mock Telegram")
+    parser.add_argument("logfile", nargs="?", help="rekaman /var/log/olt.log (default: sampel sintetis)")
+    parser.add_argument("--lines", type=int, default=10000, help="jumlah baris sintetis")
+    parser.add_argument("--rate", type=float, default=1000, help="baris/detik saat replay (0 = secepatnya)")
+    parser.add_argument("--onu-ratio", type=float, default=0.01, help="porsi baris event ONU di luar storm")
+    parser.add_argument("--olts", type=int, default=4)
+    parser.add_argument("--pons", type=int, default=8)
+    parser.add_argument("--onus-per-pon", type=int, default=64)
+    parser.add_argument("--storm-every", type=int, default=2500, help="storm mati lampu tiap N baris (0 = tanpa storm)")
+    parser.add_argument("--storm-size", type=int, default=64, help="ONU per storm")
+    parser.add_argument("--chats", type=int, default=2, help="chat tujuan per kategori")
+    parser.add_argument("--window", type=float, default=2, help="jendela agregasi (detik)")
+    parser.add_argument("--chat-rate", type=float, default=telegram_dispatcher.CHAT_RATE,
+                        help="batas pesan/detik per chat di dispatcher")
+    parser.add_argument("--telegram-latency", type=float, default=0.05)
+    parser.add_argument("--flood-every", type=int, default=0, help="balas 429 tiap N sendMessage")
+    parser.add_argument("--drain-timeout", type=float, default=120)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    population = onu_population(args.olts, args.pons, args.onus_per_pon)
+    if args.logfile:
+        with open(args.logfile, errors="replace") as f:
+            lines = f.readlines()
+    else:
+        lines = replay_lines(args.lines, population, onu_ratio=args.onu_ratio,
+                             storm_every=args.storm_every, storm_size=args.storm_size)
+    telegram_dispatcher.CHAT_RATE = args.chat_rate
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        prepare_bot(population, tmpdir, args.window)
+        stages = asyncio.run(bench_stages(lines))
+        prepare_bot(population, tmpdir, args.window)
+        e2e = asyncio.run(bench_e2e(lines, args, tmpdir))
+
+    latency = e2e["alert_latency"]
+    print(f"Sampel: {args.logfile or 'synthetic'}, {len(lines)} baris")
+    print(f"  stage parse      : {stages['parse_lines_per_second']:12,.0f} lines/s")
+    print(f"  stage kategori   : {stages['categorize_records_per_second'] or 0:12,.0f} records/s")
+    print(f"  stage format     : {stages['format_alerts_per_second'] or 0:12,.0f} alerts/s")
+    print(f"  pipeline         : {e2e['lines_per_second']:12,.0f} lines/s (replay {args.rate or 'max'} lines/s)")
+    if latency["count"]:
+        print(f"  latency alert    : p50 {latency['p50']:.3f} / p90 {latency['p90']:.3f} / "
+              f"p99 {latency['p99']:.3f} / max {latency['max']:.3f} detik ({latency['count']} sampel)")
+    print(f"  pesan Telegram   : {e2e['telegram_messages']} (429: {e2e['telegram_flood_replies']}), "
+          f"belum terkirim {e2e['undelivered']}, drain {e2e['drain_time']:.1f} detik")
+
+    if args.json:
+        write_report(args.json, "pipeline", vars(args), {"stages": stages, "e2e": e2e})
+
+
+if __name__ == "__main__":
+    main()
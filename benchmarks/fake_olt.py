@@ -0,0 +1,124 @@
+import json
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import defaultdict
+
+
+def fake_onutable(onus, pons, seed=1):
+    """Daftar ONU dengan field yang sama seperti /onutable OLT HSGQ"""
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(onus):
+        port_id = i % pons + 1
+        online = rnd.random() > 0.05
+        rows.append({
+            "onu_id": i // pons + 1,
+            "onu_name": f"PELANGGAN-{i + 1:05d}",
+            "macaddr": "e0:67:b3:" + ":".join(f"{b:02x}" for b in i.to_bytes(3, "big")),
+            "port_id": port_id,
+            "status": "Online" if online else "Offline",
+            "receive_power": f"{rnd.uniform(-27, -15):.2f}" if online else "",
+            "rtt": str(rnd.randint(5, 60)) if online else "",
+            "auth_state": 1,
+            "vendor": "HWTC",
+            "last_down_reason": "Dying gasp",
+            "last_down_time": "2026-01-02 19:46:01",
+            "register_time": "2025-11-20 08:00:00",
+        })
+    return rows
+
+
+class FakeOLT:
+    """
+    Server HTTP pengganti OLT HSGQ untuk benchmark collector: /userlogin,
+    /system, /board, /onu_allow_list dan /onutable dengan latency yang bisa diatur.
+    """
+
+    def __init__(self, onus=512, pons=8, latency=0.0, onutable_latency=0.0,
+                 hostname="FAKE-OLT", host="127.0.0.1", port=0, seed=1):
+        self.hostname = hostname
+        self.pons = pons
+        self.latency = latency
+        self.onutable_latency = onutable_latency
+        self.token = f"bench-{seed}"
+        self.stats = defaultdict(int)
+        self._onutable = json.dumps({"code": 1, "data": fake_onutable(onus, pons, seed)}).encode()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        """Dipakai sebagai olt_ip, OLTClient membentuk URL http://{olt_ip}{path}"""
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        olt = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload, status=200, headers=None):
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                path = urlsplit(self.path).path
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                olt.stats[path] += 1
+                if olt.latency:
+                    time.sleep(olt.latency)
+
+                if path != "/userlogin":
+                    self._reply({"code": 0, "message": "not found"}, status=404)
+                    return
+                self._reply({"code": 1, "message": "success", "data": {"name": "root"}},
+                            headers={"X-Token": olt.token})
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                olt.stats[path] += 1
+                if olt.latency:
+                    time.sleep(olt.latency)
+
+                if self.headers.get("X-Token") != olt.token:
+                    self._reply({"code": 0, "message": "token invalid"}, status=401)
+                    return
+
+                if path == "/system":
+                    self._reply({"code": 1, "data": {"hostname": olt.hostname}})
+                elif path == "/board":
+                    self._reply({"code": 1, "data": [{"port_id": i + 1} for i in range(olt.pons)]})
+                elif path == "/onu_allow_list":
+                    self._reply({"code": 1, "data": []})
+                elif path == "/onutable":
+                    if olt.onutable_latency:
+                        time.sleep(olt.onutable_latency)
+                    self._reply(olt._onutable)
+                else:
+                    self._reply({"code": 0, "message": "not found"}, status=404)
+
+        return Handler
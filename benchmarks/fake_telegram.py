@@ -0,0 +1,109 @@
+import json
+import time
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import defaultdict
+
+
+class FakeTelegram:
+    """
+    Server HTTP pengganti Bot API untuk benchmark: menerima sendMessage,
+    mencatat waktu terima per pesan, opsional balas 429 (flood control)
+    tiap `flood_every` request. Dipakai dengan Bot(token, base_url=fake.base_url).
+    """
+
+    def __init__(self, latency=0.0, flood_every=0, retry_after=1, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.stats = defaultdict(int)
+        self.messages = []          # (time.monotonic(), chat_id, text)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _params(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode(errors="replace")
+                if "json" in (self.headers.get("Content-Type") or ""):
+                    return json.loads(body or "{}")
+                return {key: values[0] for key, values in parse_qs(body).items()}
+
+            def do_GET(self):
+                self.do_POST()
+
+            def do_POST(self):
+                method = self.path.rsplit("/", 1)[-1]
+                params = self._params()
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                with fake._lock:
+                    fake.stats[method] += 1
+                    count = fake.stats[method]
+
+                if method == "getMe":
+                    self._reply({"ok": True, "result": {
+                        "id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"
+                    }})
+                    return
+
+                if method != "sendMessage":
+                    self._reply({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+                    return
+
+                if fake.flood_every and count % fake.flood_every == 0:
+                    with fake._lock:
+                        fake.stats["flood"] += 1
+                    self._reply({
+                        "ok": False, "error_code": 429,
+                        "description": f"Too Many Requests: retry after {fake.retry_after}",
+                        "parameters": {"retry_after": fake.retry_after}
+                    }, status=429)
+                    return
+
+                chat_id = params.get("chat_id")
+                text = params.get("text", "")
+                with fake._lock:
+                    fake.messages.append((time.monotonic(), chat_id, text))
+                self._reply({"ok": True, "result": {
+                    "message_id": count,
+                    "date": int(time.time()),
+                    "chat": {"id": int(chat_id), "type": "group"},
+                    "text": text
+                }})
+
+        return Handler
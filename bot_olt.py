@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 import asyncio
-import subprocess
-import re
+import signal
 import time
 import pymysql
-from datetime import datetime
 from collections import defaultdict
 from telegram import Bot
-from telegram.error import TelegramError
-import shlex
-
+import logging
+from log_setup import setup_logging
+from db_pool import get_pool
+from onu_cache import OnuCache
+from log_parser import parse_log_line, parse_log_time
+from snmp_client import SnmpRxPoller
+from alert_aggregator import AlertAggregator, Digest
+from telegram_dispatcher import TelegramDispatcher
+from olt_log_writer import OltLogWriter
+from state_tracker import OnuStateTracker
+from log_follower import LogFollower, LineTracker, Checkpoint
+import metrics
+
+logger = logging.getLogger("OLTBot")
 
 DB_CONFIG = {
     'host': 'localhost',
@@ -17,172 +26,180 @@ DB_CONFIG = {
     'password': 'mngpass',  
     'database': 'db_mng_olt', 
     'charset': 'utf8mb4',
-    'cursorclass': pymysql.cursors.DictCursor
+    'cursorclass': pymysql.cursors.DictCursor,
+    'autocommit': True
+}
+DB_POOL_SIZE = 5
+DB = get_pool(DB_CONFIG, size=DB_POOL_SIZE)
+
+# Insert olt_logs dikumpulkan dan di-flush multi-row di background
+OLT_LOG_WRITER = OltLogWriter(DB)
+
+# Cache state ONU per MAC, di-refresh tiap CACHE_REFRESH_INTERVAL detik
+# dari onu_current yang di-upsert onu_cronjob
+CACHE_REFRESH_INTERVAL = 60
+ONU_CACHE = OnuCache()
+
+# GET RX saat ONU up digabung per OLT (window pendek) jadi satu PDU multi-OID
+SNMP = SnmpRxPoller()
+SNMP_COMMUNITY_TTL = 300
+SNMP_COMMUNITY_CACHE = {}
+
+# Pipeline log: baca -> parse -> kategori -> agregasi -> kirim, tiap stage dihubungkan
+# antrian terbatas. overflow 'block' menahan pembaca saat antrian penuh,
+# 'drop_oldest' membuang baris terlama agar alert terbaru tetap cepat.
+# send_workers > 1 agar GET SNMP beberapa ONU bisa digabung dalam satu PDU.
+# Posisi log dan state ONU di-checkpoint tiap checkpoint_interval detik; saat
+# restart backlog dibaca ulang, dengan catchup_summary alert backlog dikirim
+# sebagai digest per (OLT, PON, kategori). Jendela mati lampu / flapping untuk
+# baris backlog memakai timestamp syslog, bukan waktu baris itu diproses.
+PIPELINE_CONFIG = {
+    'log_file': '/var/log/olt.log',
+    'queue_size': 1000,
+    'overflow': 'block',
+    'send_workers': 8,
+    'checkpoint_file': '/var/lib/olt-bot/checkpoint.json',
+    'checkpoint_interval': 5,
+    'catchup_summary': True,
+    'shutdown_timeout': 15      # detik menyelesaikan antrian + digest saat SIGTERM
+}
+PIPELINE_STATS = defaultdict(int)
+
+# Baris log yang sudah dibaca tapi belum masuk outbox Telegram / writer olt_logs.
+# Tiap item antrian membawa tuple token baris; checkpoint tidak melewati baris
+# yang tokennya belum dilepas.
+LINE_TRACKER = LineTracker()
+
+# Saat storm (mis. mati listrik satu area) alert per (OLT, PON, kategori)
+# dalam satu jendela digabung jadi satu digest setelah AGG_THRESHOLD alert tunggal
+AGGREGATOR = AlertAggregator()
+DIGEST_MAX_NAMES = 50
+DIGEST_MAX_LENGTH = 4000    # batas Telegram 4096 karakter, sisakan ruang untuk emoji (2 unit UTF-16)
+
+# Metric Prometheus di http://<host>:METRICS_PORT/metrics. Stage parse/kategori
+# per baris hanya dijumlah (counter) agar overhead di hot path kecil.
+METRICS_PORT = 9108
+STAGE_SECONDS = metrics.counter("olt_bot_stage_seconds_total", "Total waktu proses per stage pipeline", ("stage",))
+DB_LOOKUP_SECONDS = metrics.histogram("olt_bot_db_lookup_seconds", "Lookup onu_current saat cache ONU miss")
+FORMAT_SECONDS = metrics.histogram("olt_bot_format_seconds", "Format pesan (lookup ONU + RX)", ("kind",))
+ALERT_LATENCY = metrics.histogram("olt_bot_alert_latency_seconds", "Baris log dibaca sampai pesan masuk outbox", ("kind",))
+QUEUE_DEPTH = metrics.gauge("olt_bot_queue_depth", "Isi antrian pipeline", ("queue",))
+
+STATUS_MAP = {
+    'mati': '⚠️ MATI LAMPU',
+    'los': '🚨 ONU LOS',
+    'up': '✅ ONU UP'
 }
 
-dying_gasp_mac = defaultdict(float)
-mati_lampu_mac = defaultdict(float) 
-
-def get_last_rx(mac):
-
-    conn = None
-    try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT receive_power 
-                FROM onu_log 
-                WHERE macaddr = %s 
-                ORDER BY created_at DESC
-                LIMIT 50
-            """, (mac,))
-            results = cursor.fetchall()
-
-        if not results:
-            return "N/A", "database"
-
-        for row in results:
-            if row["receive_power"] is not None:
-                return f"{row['receive_power']} dBm", "database"
-
-        return "N/A", "database"
-
-    except Exception as e:
-        print(f"DB RX error: {e}")
-        return "N/A", "database"
-    finally:
-        if conn:
-            conn.close()
+# State mati lampu (jendela 10 detik) dan flapping per MAC, entry kedaluwarsa otomatis
+ONU_STATE = OnuStateTracker()
 
-def get_rx_snmp_only(olt_ip, pon, slot):
-    community_read, _ = get_snmp_community(olt_ip)
+def get_last_onu_info(mac):
+    """Ambil RX terakhir dan nama ONU, dari cache atau onu_current jika miss"""
+    cached = ONU_CACHE.get(mac)
+    if cached is None:
+        try:
+            with DB_LOOKUP_SECONDS.time():
+                cached = DB.fetchone("""
+                    SELECT onu_name, last_receive_power AS receive_power
+                    FROM onu_current
+                    WHERE macaddr = %s
+                    ORDER BY updated_at DESC
+                    LIMIT 1
+                """, (mac,))
+        except Exception as e:
+            logger.error(f"DB ONU info error: {e}")
+            return "N/A", "-"
+
+        if not cached:
+            return "N/A", "-"
+        ONU_CACHE.put(mac, cached)
+
+    rx_power = cached.get('receive_power')
+    rx_value = f"{rx_power} dBm" if rx_power is not None else "N/A"
+    return rx_value, cached.get('onu_name') or "-"
+
+async def refresh_cache_loop():
+    """Refresh cache ONU secara berkala dari onu_current"""
+    while True:
+        await asyncio.sleep(CACHE_REFRESH_INTERVAL)
+        try:
+            await DB.run_async(ONU_CACHE.refresh, DB)
+            logger.debug("ONU cache stats: %s", ONU_CACHE.stats())
+            logger.debug("ONU state stats: %s", ONU_STATE.counters())
+        except Exception as e:
+            logger.error(f"Gagal refresh cache ONU: {e}")
+
+async def get_rx_snmp_only(olt_ip, pon, slot):
+    community_read, _ = await DB.run_async(get_snmp_community, olt_ip)
     if not community_read:
         return None, None
 
-    onu_id = calculate_onu_id(pon, slot)
-    rx_oid = f".1.3.6.1.4.1.50224.3.3.3.1.4.{onu_id}.0.0"
-
     try:
-        rx_cmd = f"snmpget -v2c -c {community_read} {olt_ip} {rx_oid}"
-        rx_out = subprocess.check_output(
-            shlex.split(rx_cmd),
-            stderr=subprocess.DEVNULL,
-            timeout=5
-        ).decode()
-
-        match = re.search(r'INTEGER:\s*(-?\d+)', rx_out)
-        if not match:
+        rx_power = await SNMP.get_rx(olt_ip, community_read, calculate_onu_id(pon, slot))
+        if rx_power is None:
             return None, None
 
-        rx_dbm = f"{int(match.group(1)) / 100:.2f} dBm"
-        return rx_dbm, "olt"
+        return f"{rx_power:.2f} dBm", "olt"
 
     except Exception as e:
-        print(f"SNMP RX error: {e}")
+        logger.error(f"SNMP RX error: {e}")
         return None, None
 
-def get_rx_with_source(data_log, category):
+async def get_rx_with_source(data_log, category, last_rx):
 
     if category == 'up':
-        rx, source = get_rx_snmp_only(
-            data_log['olt_ip'],
-            data_log['pon'],
-            data_log['slot']
+        rx, source = await get_rx_snmp_only(
+            data_log.olt_ip,
+            data_log.pon,
+            data_log.slot
         )
         if rx:
             return rx, source
 
 
-    return get_last_rx(data_log['mac'])
+    return last_rx, "database"
 
 def calculate_onu_id(pon, slot):
     """Hitung ID ONU berdasarkan rumus HSGQ"""
     return 16777472 + (pon - 1) * 256 + slot
 
-def get_onu_name_from_db(mac):
-    """Ambil nama ONU terakhir dari onu_log"""
-    try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT onu_name
-                FROM onu_log
-                WHERE macaddr = %s
-                  AND onu_name IS NOT NULL
-                  AND onu_name != ''
-                ORDER BY created_at DESC
-                LIMIT 1
-            """, (mac,))
-            row = cursor.fetchone()
-        conn.close()
-
-        return row['onu_name'] if row else "-"
-
-    except Exception as e:
-        print(f"DB ONU NAME error: {e}")
-        return "-"
-
-
-
 def get_snmp_community(olt_ip):
     """
-    Ambil community SNMP dari tabel olt
+    Ambil community SNMP dari tabel olt (di-cache SNMP_COMMUNITY_TTL detik)
     kolom: ip, community_read, community_write
     """
+    cached = SNMP_COMMUNITY_CACHE.get(olt_ip)
+    if cached and time.monotonic() - cached[1] < SNMP_COMMUNITY_TTL:
+        return cached[0]
+
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT community_read, community_write
-                FROM olt
-                WHERE ip = %s
-                LIMIT 1
-            """, (olt_ip,))
-            row = cursor.fetchone()
-        conn.close()
-
-        if not row:
-            return None, None
+        row = DB.fetchone("""
+            SELECT community_read, community_write
+            FROM olt
+            WHERE ip = %s
+            LIMIT 1
+        """, (olt_ip,))
 
-        return row['community_read'], row['community_write']
+        community = (row['community_read'], row['community_write']) if row else (None, None)
+        SNMP_COMMUNITY_CACHE[olt_ip] = (community, time.monotonic())
+        return community
 
     except Exception as e:
-        print(f"ERROR ambil community SNMP: {e}")
+        logger.error(f"ERROR ambil community SNMP: {e}")
         return None, None
 
-def insert_olt_log(raw_log, log_time, hostname, mac_address):
-    """Insert data ke tabel olt_logs"""
-    try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cursor:
-            sql = """
-                INSERT INTO olt_logs (raw_log, log_time, hostname, mac_address)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(sql, (raw_log, log_time, hostname, mac_address))
-        conn.commit()
-        conn.close()
-        print(f"SUCCESS: Data inserted to olt_logs - MAC: {mac_address}")
-    except pymysql.Error as err:
-        print(f"ERROR: Gagal insert ke olt_logs: {err}")
-    except Exception as e:
-        print(f"ERROR: Unexpected error insert olt_logs: {e}")
-
 def get_bot_token():
     """Ambil token bot dari database"""
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT token FROM telegram_bot LIMIT 1")
-            result = cursor.fetchone()
-        conn.close()
-        
+        result = DB.fetchone("SELECT token FROM telegram_bot LIMIT 1")
+
         if result:
             return result['token']
         else:
             raise Exception("Token bot tidak ditemukan di database")
     except pymysql.Error as err:
-        print(f"Database error: {err}")
+        logger.error(f"Database error: {err}")
         raise Exception(f"Gagal mengambil token dari database: {err}")
 
 def get_chat_ids():
@@ -194,12 +211,8 @@ def get_chat_ids():
     }
     
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT kategori, chat_id FROM telegram_chat")
-            results = cursor.fetchall()
-        conn.close()
-        
+        results = DB.fetchall("SELECT kategori, chat_id FROM telegram_chat")
+
         for row in results:
             kategori = row['kategori']
             chat_id = row['chat_id']
@@ -208,233 +221,404 @@ def get_chat_ids():
         
         return chat_ids
     except pymysql.Error as err:
-        print(f"Database error: {err}")
+        logger.error(f"Database error: {err}")
 
         return chat_ids
 
-def get_server_time():
-    """Dapatkan waktu server yang sudah diformat"""
-    now = datetime.now()
-    return now.strftime("%Y-%m-%d %H:%M:%S")
-
-def parse_log_line(line):
-    """Parse log line dan ekstrak informasi"""
-    print(f"DEBUG: Processing line: {line.strip()}")
-    
+def event_time(data_log):
+    """Waktu kejadian (skala time.monotonic) menurut timestamp syslog baris backlog"""
+    now = time.monotonic()
+    logged = parse_log_time(data_log.waktu_olt)
+    if logged is None:
+        return now
+    return now - max(0.0, time.time() - logged)
 
-    pattern = (
-        r'^(\w+\s+\d+\s+\d+:\d+:\d+)\s+'  
-        r'(\S+)\s+'                        
-        r'([^:]+):\s+'                    
-        r'\[[^\]]+\]\s+'                  
-        r'Info:\s+'
-        r'(ONU\s+\d+/\d+(?:\s+Port\s+\d+)?\s+[0-9a-f:]+)\s+'  
-        r'(.*)$'                           
-    )
-    match = re.match(pattern, line)
-    
-    if not match:
-        print("DEBUG: No regex match with main pattern")
+def kategori_log(data_log, backlog=False):
+    if not data_log or not data_log.mac:
         return None
-    
-    waktu, gateway_or_ip, olt_name, onu_info, status = match.groups()
-    print(f"DEBUG: Parsed - waktu={waktu}, gateway_or_ip={gateway_or_ip}, olt_name={olt_name}, onu_info={onu_info}, status={status}")
-    
 
-    mac_match = re.search(r'([0-9a-f:]{17})', onu_info)
-    mac = mac_match.group(1) if mac_match else None
-    pon_slot_match = re.search(r'ONU\s+(\d+)/(\d+)', onu_info)
-    pon = int(pon_slot_match.group(1)) if pon_slot_match else None
-    slot = int(pon_slot_match.group(2)) if pon_slot_match else None
-
-    return {
-        'waktu_server': get_server_time(),
-        'waktu_olt': waktu.strip(),
-        'olt': f"{gateway_or_ip} {olt_name}".strip(),
-        'olt_ip': gateway_or_ip,
-        'onu_info': onu_info.strip(),
-        'status': status.strip(),
-        'mac': mac,
-        'pon': pon,
-        'slot': slot,
-        'raw_log': line.strip()
-    }
-def kategori_log(data_log):
-    if not data_log or 'mac' not in data_log or not data_log['mac']:
-        return None
+    status = data_log.status.lower()
+    mac = data_log.mac
+    current_time = event_time(data_log) if backlog else time.monotonic()
+    ONU_STATE.expire(current_time)
 
-    status = data_log['status'].lower()
-    mac = data_log['mac']
-    current_time = time.time()
+    if 'dying gasp' in status:
+        ONU_STATE.mark_dying_gasp(mac, current_time)
+        category = 'mati'
 
+    elif ONU_STATE.in_mati_window(mac, current_time):
+        if 'link up' not in status:
+            logger.debug("Abaikan pesan untuk MAC %s (periode 10 detik setelah mati lampu): %s", mac, status)
+            return None
+        ONU_STATE.clear_mati(mac)
+        category = 'up'
 
-    if 'dying gasp' in status:
+    elif 'laser out' in status or 'only ctc lost' in status:
+        category = 'los'
 
-        dying_gasp_mac[mac] = current_time
-        mati_lampu_mac[mac] = current_time
-        return 'mati'
+    elif 'link up' in status:
+        category = 'up'
 
+    elif 'manual reboot' in status:
+        category = 'mati'
 
-    if mac in mati_lampu_mac:
-        time_since_mati_lampu = current_time - mati_lampu_mac[mac]
-        
+    else:
+        return None
 
-        if time_since_mati_lampu < 10:
-
-            if 'link up' in status:
-                if mac in mati_lampu_mac:
-                    del mati_lampu_mac[mac]
-                if mac in dying_gasp_mac:
-                    del dying_gasp_mac[mac]
-                return 'up'
-            else:
-                print(f"DEBUG: Abaikan pesan untuk MAC {mac} (periode 10 detik setelah mati lampu): {status}")
-                return None
-        
-        else:
-            if mac in mati_lampu_mac:
-                del mati_lampu_mac[mac]
-            if mac in dying_gasp_mac:
-                del dying_gasp_mac[mac]
+    if ONU_STATE.record_transition(mac, category, current_time):
+        logger.debug("Abaikan pesan untuk MAC %s (flapping): %s", mac, status)
+        return None
+
+    return category
 
 
-    if 'laser out' in status:
-        return 'los'
+async def format_message(data_log, category):
+    last_rx, onu_name = await DB.run_async(get_last_onu_info, data_log.mac)
+    rx_value, rx_source = await get_rx_with_source(data_log, category, last_rx)
 
-    if 'only ctc lost' in status:
-        return 'los'
+    return f"""{STATUS_MAP[category]}
 
+🕒 Waktu Server: {data_log.waktu_server}
 
-    if 'link up' in status:
-        return 'up'
+⏰ Waktu OLT: {data_log.waktu_olt}
 
+💻 OLT: {data_log.olt}
 
-    if 'manual reboot' in status:
-        return 'mati'
+📛 Nama ONU: {onu_name}
 
-    return None
+📡 ONU: {data_log.onu_info.replace('ONU ', '')}
 
+📶 RX Terakhir: {rx_value} ({rx_source})
 
+📝 Info: {data_log.status}
+"""
+    return message
 
-def format_message(data_log, category):
-    rx_value, rx_source = get_rx_with_source(data_log, category)
-    onu_name = get_onu_name_from_db(data_log['mac'])
 
-    status_map = {
-        'mati': '⚠️ MATI LAMPU',
-        'los': '🚨 ONU LOS',
-        'up': '✅ ONU UP'
-    }
+def get_onu_names(macs):
+    """Nama ONU untuk daftar MAC (cache, fallback onu_current)"""
+    return [get_last_onu_info(mac)[1] for mac in macs]
 
-    return f"""{status_map[category]}
+async def format_digest(digest):
+    """Satu pesan ringkasan untuk banyak ONU di PON yang sama"""
+    events = digest.events
+    names = await DB.run_async(get_onu_names, [event.mac for event in events[:DIGEST_MAX_NAMES]])
 
-🕒 Waktu Server: {data_log['waktu_server']}
+    total = len(events) + digest.sent_single
+    if digest.sent_single:
+        total = f"{total} ({digest.sent_single} sudah dikirim terpisah)"
 
-⏰ Waktu OLT: {data_log['waktu_olt']}
+    header = f"""{STATUS_MAP[digest.category]} MASSAL
 
-💻 OLT: {data_log['olt']}
+💻 OLT: {digest.olt}
 
-📛 Nama ONU: {onu_name}
+📡 PON: {digest.pon}
 
-📡 ONU: {data_log['onu_info'].replace('ONU ', '')}
+🔢 Jumlah ONU: {total}
 
-📶 RX Terakhir: {rx_value} ({rx_source})
+🕒 Waktu Server: {events[0].waktu_server} s/d {events[-1].waktu_server}
 
-📝 Info: {data_log['status']}
+📛 Daftar ONU:
 """
-    return message
-
 
-async def send_to_telegram(message, category, bot, chat_ids, data_log):
-    """Kirim pesan ke grup Telegram dan insert ke database"""
+    # onu_info sudah memuat MAC; daftar dipotong agar pesan tidak ditolak BadRequest
+    lines = []
+    length = len(header)
+    for name, event in zip(names, events):
+        line = f"- {name} ({event.onu_info.replace('ONU ', '')})"
+        remaining = len(events) - len(lines) - 1
+        reserve = len(f"\n... dan {remaining} ONU lainnya") if remaining else 0
+        if length + len(line) + 1 + reserve > DIGEST_MAX_LENGTH:
+            break
+        lines.append(line)
+        length += len(line) + 1
+    if len(events) > len(lines):
+        lines.append(f"... dan {len(events) - len(lines)} ONU lainnya")
+
+    return header + "\n".join(lines) + "\n"
+
+
+async def send_to_telegram(message, category, dispatcher, chat_ids, data_logs):
+    """Antrikan pesan ke dispatcher Telegram lalu insert ke database"""
     if category not in chat_ids or not chat_ids[category]:
-        print(f"WARNING: Tidak ada chat ID untuk kategori {category}")
+        logger.warning(f"Tidak ada chat ID untuk kategori {category}")
         return
-    
 
-    insert_olt_log(
-        raw_log=data_log['raw_log'],
-        log_time=data_log['waktu_server'],
-        hostname=data_log['olt'],
-        mac_address=data_log['mac']
-    )
-    
-    for chat_id in chat_ids[category]:
+    # pengiriman berjalan di dispatcher, olt_logs di-insert batch oleh writer
+    dispatcher.enqueue(chat_ids[category], message)
+
+    for data_log in data_logs:
+        OLT_LOG_WRITER.add(
+            data_log.raw_log,
+            data_log.waktu_server,
+            data_log.olt,
+            data_log.mac
+        )
+
+async def put_with_backpressure(queue, item):
+    """Masukkan item ke antrian sesuai mode backpressure"""
+    if PIPELINE_CONFIG['overflow'] != 'drop_oldest':
+        await queue.put(item)
+        return
+
+    while True:
         try:
-            await bot.send_message(chat_id=chat_id, text=message)
-            print(f"SUCCESS: Pesan terkirim ke {category}: {chat_id}")
-        except TelegramError as e:
-            print(f"ERROR: Gagal mengirim ke {category}: {e}")
+            queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            try:
+                dropped = queue.get_nowait()
+                queue.task_done()
+                LINE_TRACKER.done(*dropped[-1])
+                PIPELINE_STATS['dropped'] += 1
+            except asyncio.QueueEmpty:
+                pass
+
+def save_checkpoint(checkpoint, follower):
+    """Simpan posisi baris tertua yang belum selesai diproses dan state ONU"""
+    try:
+        checkpoint.save({"log": LINE_TRACKER.position(follower.position()), "state": ONU_STATE.snapshot()})
+    except Exception as e:
+        logger.error(f"Gagal simpan checkpoint: {e}")
+
+def open_log():
+    """Checkpoint + follower yang lanjut dari posisi tersimpan"""
+    log_file = PIPELINE_CONFIG['log_file']
+    logger.info(f"Memonitor file: {log_file}")
+
+    checkpoint = Checkpoint(PIPELINE_CONFIG['checkpoint_file'])
+    saved = checkpoint.load()
+    ONU_STATE.restore(saved.get("state"))
+    return checkpoint, LogFollower(log_file, **saved.get("log", {}))
+
+async def read_stage(line_queue, checkpoint, follower):
+    """Baca log baru per blok, lanjut dari checkpoint terakhir saat restart"""
+    last_save = time.monotonic()
+    try:
+        async for lines in follower.batches():
+            received_at = time.monotonic()
+            catchup = follower.catching_up
+            for offset, line in lines:
+                PIPELINE_STATS['read'] += 1
+                token = LINE_TRACKER.add(follower.inode, offset)
+                await put_with_backpressure(line_queue, (received_at, line, catchup, (token,)))
+
+            if received_at - last_save >= PIPELINE_CONFIG['checkpoint_interval']:
+                save_checkpoint(checkpoint, follower)
+                last_save = received_at
+    finally:
+        save_checkpoint(checkpoint, follower)
+
+async def parse_stage(line_queue, parsed_queue):
+    """Stage parse: ubah baris log mentah jadi data_log"""
+    while True:
+        received_at, line, catchup, tokens = await line_queue.get()
+        release = True
+        try:
+            logger.debug("LOG BARU: %s", line.rstrip())
+
+            started = time.perf_counter()
+            data_log = parse_log_line(line)
+            STAGE_SECONDS.inc(time.perf_counter() - started, stage="parse")
+            if not data_log:
+                logger.debug("Gagal parse log, skip")
+                continue
+
+            if not data_log.mac:
+                logger.debug("Tidak ada MAC address, skip")
+                continue
+
+            PIPELINE_STATS['parsed'] += 1
+            await put_with_backpressure(parsed_queue, (received_at, data_log, catchup, tokens))
+            release = False
+        except asyncio.CancelledError:
+            # shutdown: baris tetap pending, dibaca ulang setelah restart
+            release = False
+            raise
+        finally:
+            if release:
+                LINE_TRACKER.done(*tokens)
+            line_queue.task_done()
+
+async def categorize_stage(parsed_queue, alert_queue):
+    """Stage kategori: tentukan mati/los/up dari data_log"""
+    while True:
+        received_at, data_log, catchup, tokens = await parsed_queue.get()
+        release = True
+        try:
+            started = time.perf_counter()
+            category = kategori_log(data_log, backlog=catchup)
+            STAGE_SECONDS.inc(time.perf_counter() - started, stage="categorize")
+            if not category:
+                logger.debug("Tidak ada kategori, skip")
+                continue
+
+            PIPELINE_STATS['categorized'] += 1
+            digest_only = catchup and PIPELINE_CONFIG['catchup_summary']
+            await put_with_backpressure(alert_queue, (received_at, data_log, category, digest_only, tokens))
+            release = False
+        except asyncio.CancelledError:
+            # shutdown: baris tetap pending, dibaca ulang setelah restart
+            release = False
+            raise
+        finally:
+            if release:
+                LINE_TRACKER.done(*tokens)
+            parsed_queue.task_done()
+
+async def send_stage(send_queue, dispatcher, chat_ids):
+    """Stage kirim: format pesan (tunggal atau digest) lalu kirim ke Telegram"""
+    while True:
+        received_at, data_log, category, tokens = await send_queue.get()
+        release = True
+        try:
+            kind = "digest" if isinstance(data_log, Digest) else "single"
+            with FORMAT_SECONDS.time(kind=kind):
+                if kind == "digest":
+                    message = await format_digest(data_log)
+                    records = data_log.events
+                    PIPELINE_STATS['digests'] += 1
+                else:
+                    message = await format_message(data_log, category)
+                    records = [data_log]
+            logger.debug("Message formatted: %s", message)
+
+            await send_to_telegram(message, category, dispatcher, chat_ids, records)
+            PIPELINE_STATS['sent'] += 1
+            latency = time.monotonic() - received_at
+            ALERT_LATENCY.observe(latency, kind=kind)
+            logger.debug("Latency alert %.3f detik", latency)
+        except asyncio.CancelledError:
+            release = False
+            raise
+        except Exception as e:
+            logger.error(f"Gagal proses alert {category} {data_log.olt}: {e}")
+        finally:
+            # sudah di outbox + writer (atau gagal permanen): baris boleh dilewati checkpoint
+            if release:
+                LINE_TRACKER.done(*tokens)
+            send_queue.task_done()
+
+async def drain_pipeline(stage_queues, send_queue):
+    """Selesaikan antrian, kirim digest yang masih ditahan aggregator, lalu tunggu stage kirim"""
+    for queue in stage_queues:
+        await queue.join()
+    await AGGREGATOR.flush(send_queue)
+    await send_queue.join()
+
+async def shutdown_pipeline(reader, stage_queues, send_queue):
+    """Stop baca log lalu drain pipeline, dibatasi shutdown_timeout"""
+    reader.cancel()
+    await asyncio.gather(reader, return_exceptions=True)
+    timeout = PIPELINE_CONFIG['shutdown_timeout']
+    try:
+        await asyncio.wait_for(drain_pipeline(stage_queues, send_queue), timeout)
+        logger.info("Antrian dan digest selesai diproses")
+    except asyncio.TimeoutError:
+        # baris yang belum selesai tidak dilewati checkpoint, dibaca ulang setelah restart
+        logger.warning(f"Pipeline belum kosong setelah {timeout} detik, {len(LINE_TRACKER)} baris dibaca ulang saat start")
+
+def register_metrics(dispatcher, queues):
+    """Ekspos kedalaman antrian dan counter tiap komponen ke endpoint metrics"""
+    for name, queue in queues.items():
+        QUEUE_DEPTH.set_function(queue.qsize, queue=name)
+    QUEUE_DEPTH.set_function(lambda: dispatcher.backlog, queue='telegram_outbox')
+    metrics.register_stats("olt_bot_pipeline", "Counter pipeline log", lambda: PIPELINE_STATS)
+    metrics.register_stats("olt_bot_onu_cache", "Statistik cache ONU", ONU_CACHE.stats)
+    metrics.register_stats("olt_bot_onu_state", "State mati lampu / flapping", lambda: ONU_STATE.counters())
+    metrics.register_stats("olt_bot_aggregator", "Alert tunggal / digest", lambda: AGGREGATOR.stats)
+    metrics.register_stats("olt_bot_snmp", "Request / GET SNMP", lambda: SNMP.stats)
+    metrics.register_stats("olt_bot_telegram", "Dispatcher Telegram", lambda: dispatcher.stats)
+    metrics.register_stats("olt_bot_olt_logs_writer", "Writer olt_logs", lambda: OLT_LOG_WRITER.stats)
 
 async def monitor_log():
     """Monitor log file dan proses log baru"""
-    print("Memulai monitoring log OLT...")
+    logger.info("Memulai monitoring log OLT...")
     
 
     try:
-        BOT_TOKEN = get_bot_token()
-        CHAT_IDS = get_chat_ids()
+        BOT_TOKEN = await DB.run_async(get_bot_token)
+        CHAT_IDS = await DB.run_async(get_chat_ids)
         bot = Bot(token=BOT_TOKEN)
         
-        print("Berhasil mengambil konfigurasi dari database")
-        print(f"Token: {BOT_TOKEN}")
-        print(f"Chat IDs: {CHAT_IDS}")
+        logger.info("Berhasil mengambil konfigurasi dari database")
+        logger.info(f"Chat IDs: {CHAT_IDS}")
     except Exception as e:
-        print(f"ERROR: Gagal mengambil konfigurasi dari database: {e}")
+        logger.error(f"Gagal mengambil konfigurasi dari database: {e}")
         return
     
-    print(f"Memonitor file: /var/log/olt.log")
-    
 
-    process = subprocess.Popen(
-        ['tail', '-n0', '-F', '/var/log/olt.log'],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        universal_newlines=True,
-        bufsize=1
-    )
-    
-    print("Menunggu log baru...")
-    
-    while True:
-        line = process.stdout.readline()
-        if not line:
-            await asyncio.sleep(0.1)
-            continue
-        
-        print(f"LOG BARU: {line.strip()}")
-        
+    try:
+        await DB.run_async(ONU_CACHE.warm_load, DB)
+    except Exception as e:
+        logger.warning(f"Warm load cache ONU gagal, fallback ke query DB: {e}")
 
-        data_log = parse_log_line(line)
-        if not data_log:
-            print("DEBUG: Gagal parse log, skip")
-            continue
-            
-        if not data_log.get('mac'):
-            print("DEBUG: Tidak ada MAC address, skip")
-            continue
-        
+    dispatcher = TelegramDispatcher(bot)
+    await dispatcher.start()
 
-        category = kategori_log(data_log)
-        if not category:
-            print("DEBUG: Tidak ada kategori, skip")
-            continue
-        
+    queue_size = PIPELINE_CONFIG['queue_size']
+    line_queue = asyncio.Queue(maxsize=queue_size)
+    parsed_queue = asyncio.Queue(maxsize=queue_size)
+    alert_queue = asyncio.Queue(maxsize=queue_size)
+    send_queue = asyncio.Queue(maxsize=queue_size)
 
-        message = format_message(data_log, category)
-        print(f"DEBUG: Message formatted: {message}")
-        
-        await send_to_telegram(message, category, bot, CHAT_IDS, data_log)
+    register_metrics(dispatcher, {
+        'line': line_queue, 'parsed': parsed_queue, 'alert': alert_queue, 'send': send_queue
+    })
+    try:
+        metrics.start_http_server(METRICS_PORT)
+    except OSError as e:
+        logger.warning(f"Endpoint metrics port {METRICS_PORT} gagal dibuka: {e}")
+
+    checkpoint, follower = open_log()
+    reader = asyncio.create_task(read_stage(line_queue, checkpoint, follower))
+    tasks = [
+        asyncio.create_task(refresh_cache_loop()),
+        asyncio.create_task(OLT_LOG_WRITER.run()),
+        reader,
+        asyncio.create_task(parse_stage(line_queue, parsed_queue)),
+        asyncio.create_task(categorize_stage(parsed_queue, alert_queue)),
+        asyncio.create_task(AGGREGATOR.run(alert_queue, send_queue)),
+    ]
+    for _ in range(PIPELINE_CONFIG['send_workers']):
+        tasks.append(asyncio.create_task(send_stage(send_queue, dispatcher, CHAT_IDS)))
+
+    # SIGTERM (systemd stop) / SIGINT membatalkan task utama agar shutdown di bawah berjalan
+    main_task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, main_task.cancel)
+
+    logger.info("Menunggu log baru...")
+
+    try:
+        # wait (bukan gather) agar stage tidak ikut dibatalkan sebelum antrian di-drain
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    except asyncio.CancelledError:
+        logger.info("Bot dihentikan, menyelesaikan antrian...")
+    finally:
+        await shutdown_pipeline(reader, [line_queue, parsed_queue, alert_queue], send_queue)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        save_checkpoint(checkpoint, follower)
+        await dispatcher.close()
+        await OLT_LOG_WRITER.close()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
 
 async def main():
     """Main function"""
     try:
         await monitor_log()
     except KeyboardInterrupt:
-        print("Bot dihentikan")
+        logger.info("Bot dihentikan")
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error(f"Error: {e}")
 
 if __name__ == "__main__":
-    print("Starting OLT Monitor Bot...")
+    setup_logging()
+    logger.info("Starting OLT Monitor Bot...")
     asyncio.run(main())
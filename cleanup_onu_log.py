@@ -1,11 +1,11 @@
+import time
 import logging
-import pymysql as mysql
+import argparse
+from log_setup import setup_logging
+from db_pool import get_pool
+from partition_maintenance import parse_partition_bound
 
 # ---------------- LOGGING ----------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s"
-)
 logger = logging.getLogger("ONUCleanup")
 
 # ---------------- DB CONFIG ----------------
@@ -21,43 +21,164 @@ DB_CONFIG = {
 RETENTION_DAYS = 30  
 TABLE_NAME = "onu_log"  
 
-# ---------------- MAIN ----------------
-def main():
-    conn = mysql.connect(**DB_CONFIG)
+# tabel yang didukung retention engine: nama -> kolom waktu (ber-index)
+RETENTION_TABLES = {
+    "onu_log": "created_at",
+    "olt_logs": "log_time",
+}
+
+BATCH_SIZE = 5000       # rentang id per DELETE
+BATCH_SLEEP = 0.2       # detik jeda antar chunk agar insert collector tidak tertahan
+PROGRESS_EVERY = 50     # log progress tiap N chunk
+
+# "rows"      = DELETE per rentang primary key
+# "partition" = DROP PARTITION harian/bulanan yang seluruhnya lebih tua dari retention
+MODE = "rows"
+
+
+# ---------------- ROWS MODE ----------------
+def get_id_range(cur, table, time_column, cutoff):
+    """Rentang id yang boleh dihapus: [MIN(id), id pertama yang masih disimpan)"""
+    cur.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+    min_id, max_id = cur.fetchone()
+    if min_id is None:
+        return None, None
+
+    # id naik seiring waktu insert, cukup cari row pertama yang >= cutoff
+    cur.execute(f"""
+        SELECT id
+        FROM {table}
+        WHERE {time_column} >= %s
+        ORDER BY {time_column}
+        LIMIT 1
+    """, (cutoff,))
+    row = cur.fetchone()
+    end_id = row[0] if row else max_id + 1
+    return min_id, end_id
+
+
+def delete_in_chunks(conn, table, days, batch_size=BATCH_SIZE, sleep=BATCH_SLEEP):
+    """Hapus row lebih tua dari `days` hari per chunk id, tiap chunk commit sendiri"""
+    time_column = RETENTION_TABLES[table]
     cur = conn.cursor()
 
     try:
-        logger.info(f"Start cleanup data > {RETENTION_DAYS} hari di table {TABLE_NAME}")
+        cur.execute("SELECT NOW() - INTERVAL %s DAY", (days,))
+        cutoff = cur.fetchone()[0]
+
+        start_id, end_id = get_id_range(cur, table, time_column, cutoff)
+        if start_id is None or start_id >= end_id:
+            logger.info(f"[{table}] Tidak ada data lama yang perlu dihapus")
+            return {"table": table, "deleted": 0, "elapsed": 0.0, "rows_per_sec": 0.0}
+
+        logger.info(f"[{table}] Hapus data < {cutoff} (id {start_id}..{end_id - 1}), batch {batch_size}")
+
+        started = time.monotonic()
+        deleted = 0
+        chunks = 0
+        lo = start_id
+        while lo < end_id:
+            hi = min(lo + batch_size, end_id)
+            # filter waktu tetap dipakai untuk row yang id-nya tidak urut waktu
+            deleted += cur.execute(f"""
+                DELETE FROM {table}
+                WHERE id >= %s AND id < %s
+                  AND {time_column} < %s
+            """, (lo, hi, cutoff))
+            conn.commit()
+            chunks += 1
+            lo = hi
+
+            if chunks % PROGRESS_EVERY == 0:
+                elapsed = time.monotonic() - started
+                progress = (lo - start_id) * 100 / (end_id - start_id)
+                logger.info(f"[{table}] Progress {progress:.1f}%: {deleted} row dihapus, {deleted / elapsed:.0f} rows/s")
+
+            if sleep and lo < end_id:
+                time.sleep(sleep)
+
+        elapsed = time.monotonic() - started
+        rows_per_sec = deleted / elapsed if elapsed else 0.0
+        logger.info(f"[{table}] Cleanup selesai, {deleted} row dihapus dalam {elapsed:.1f}s ({rows_per_sec:.0f} rows/s)")
+        return {"table": table, "deleted": deleted, "elapsed": elapsed, "rows_per_sec": rows_per_sec}
+
+    finally:
+        cur.close()
+
 
+# ---------------- PARTITION MODE ----------------
+def drop_old_partitions(conn, table, days):
+    """Drop partisi yang seluruh isinya lebih tua dari `days` hari"""
+    cur = conn.cursor()
 
-        cur.execute(f"""
-            SELECT COUNT(*) 
-            FROM {TABLE_NAME}
-            WHERE created_at < NOW() - INTERVAL %s DAY
-        """, (RETENTION_DAYS,))
-        total = cur.fetchone()[0]
+    try:
+        cur.execute("SELECT NOW() - INTERVAL %s DAY", (days,))
+        cutoff = cur.fetchone()[0]
+
+        cur.execute("""
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = %s
+              AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """, (table,))
+        partitions = cur.fetchall()
+        if not partitions:
+            raise Exception(f"Tabel {table} tidak dipartisi, gunakan MODE rows")
+
+        started = time.monotonic()
+        dropped = []
+        estimated_rows = 0
+        for name, description, table_rows in partitions:
+            bound = parse_partition_bound(description)
+            if bound is None or bound > cutoff:
+                continue
+            cur.execute(f"ALTER TABLE {table} DROP PARTITION {name}")
+            dropped.append(name)
+            estimated_rows += table_rows or 0
+            logger.info(f"[{table}] Partisi {name} (< {bound}) di-drop, ~{table_rows} row")
+
+        elapsed = time.monotonic() - started
+        if not dropped:
+            logger.info(f"[{table}] Tidak ada partisi lama yang perlu di-drop")
+        else:
+            logger.info(f"[{table}] {len(dropped)} partisi di-drop dalam {elapsed:.1f}s (~{estimated_rows} row)")
+        return {"table": table, "deleted": estimated_rows, "elapsed": elapsed, "partitions": dropped}
 
-        if total == 0:
-            logger.info("Tidak ada data lama yang perlu dihapus")
-            return
+    finally:
+        cur.close()
 
-        logger.info(f"Data yang akan dihapus: {total}")
 
+# ---------------- MAIN ----------------
+def cleanup(conn, table=TABLE_NAME, days=RETENTION_DAYS, mode=MODE,
+            batch_size=BATCH_SIZE, sleep=BATCH_SLEEP):
+    logger.info(f"Start cleanup data > {days} hari di table {table} (mode {mode})")
+    if mode == "partition":
+        return drop_old_partitions(conn, table, days)
+    return delete_in_chunks(conn, table, days, batch_size, sleep)
 
-        cur.execute(f"""
-            DELETE FROM {TABLE_NAME}
-            WHERE created_at < NOW() - INTERVAL %s DAY
-        """, (RETENTION_DAYS,))
 
-        conn.commit()
-        logger.info(f"Cleanup selesai, {total} row dihapus")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Retention onu_log / olt_logs")
+    parser.add_argument("--table", action="append", choices=sorted(RETENTION_TABLES),
+                        help=f"tabel yang dibersihkan (default {TABLE_NAME}, bisa diulang)")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--mode", choices=["rows", "partition"], default=MODE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=BATCH_SLEEP)
+    return parser.parse_args()
 
-    except Exception as e:
-        logger.error(f"Gagal cleanup data: {e}")
 
-    finally:
-        cur.close()
-        conn.close()
+def main():
+    setup_logging()
+    args = parse_args()
+    for table in args.table or [TABLE_NAME]:
+        try:
+            with get_pool(DB_CONFIG, size=1).connection() as conn:
+                cleanup(conn, table, args.days, args.mode, args.batch_size, args.sleep)
+        except Exception as e:
+            logger.error(f"Gagal cleanup data {table}: {e}")
 
 
 if __name__ == "__main__":
@@ -101,6 +101,110 @@ CREATE TABLE `onu_log` (
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `onu_current`
+--
+
+CREATE TABLE `onu_current` (
+  `olt_id` int NOT NULL,
+  `macaddr` varchar(32) NOT NULL,
+  `olt_ip` varchar(64) NOT NULL,
+  `olt_hostname` varchar(128) NOT NULL,
+  `onu_id` int NOT NULL,
+  `onu_name` varchar(128) DEFAULT NULL,
+  `port_id` int NOT NULL,
+  `status` varchar(50) NOT NULL,
+  `receive_power` decimal(6,2) DEFAULT NULL,
+  `last_receive_power` decimal(6,2) DEFAULT NULL,
+  `rtt` decimal(6,2) DEFAULT NULL,
+  `auth_state` tinyint DEFAULT NULL,
+  `vendor` varchar(100) DEFAULT NULL,
+  `last_down_reason` varchar(255) DEFAULT NULL,
+  `last_down_time` varchar(64) DEFAULT NULL,
+  `register_time` varchar(64) DEFAULT NULL,
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `onu_log_state`
+--
+
+CREATE TABLE `onu_log_state` (
+  `olt_id` int NOT NULL,
+  `macaddr` varchar(32) NOT NULL,
+  `status` varchar(50) DEFAULT NULL,
+  `auth_state` tinyint DEFAULT NULL,
+  `receive_power` decimal(6,2) DEFAULT NULL,
+  `rtt` decimal(6,2) DEFAULT NULL,
+  `written_at` datetime NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `onu_rollup_hourly`
+--
+
+CREATE TABLE `onu_rollup_hourly` (
+  `olt_id` int NOT NULL,
+  `macaddr` varchar(32) NOT NULL,
+  `bucket` datetime NOT NULL COMMENT 'awal jam',
+  `samples` int NOT NULL DEFAULT '0',
+  `online_samples` int NOT NULL DEFAULT '0',
+  `rx_count` int NOT NULL DEFAULT '0',
+  `rx_sum` decimal(14,2) NOT NULL DEFAULT '0.00',
+  `rx_min` decimal(6,2) DEFAULT NULL,
+  `rx_max` decimal(6,2) DEFAULT NULL,
+  `rx_avg` decimal(6,2) GENERATED ALWAYS AS ((`rx_sum` / nullif(`rx_count`,0))) STORED,
+  `rtt_count` int NOT NULL DEFAULT '0',
+  `rtt_sum` decimal(14,2) NOT NULL DEFAULT '0.00',
+  `rtt_min` decimal(6,2) DEFAULT NULL,
+  `rtt_max` decimal(6,2) DEFAULT NULL,
+  `rtt_avg` decimal(6,2) GENERATED ALWAYS AS ((`rtt_sum` / nullif(`rtt_count`,0))) STORED,
+  `availability` decimal(5,2) GENERATED ALWAYS AS (((100 * `online_samples`) / nullif(`samples`,0))) STORED
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `onu_rollup_daily`
+--
+
+CREATE TABLE `onu_rollup_daily` (
+  `olt_id` int NOT NULL,
+  `macaddr` varchar(32) NOT NULL,
+  `bucket` datetime NOT NULL COMMENT 'awal hari',
+  `samples` int NOT NULL DEFAULT '0',
+  `online_samples` int NOT NULL DEFAULT '0',
+  `rx_count` int NOT NULL DEFAULT '0',
+  `rx_sum` decimal(14,2) NOT NULL DEFAULT '0.00',
+  `rx_min` decimal(6,2) DEFAULT NULL,
+  `rx_max` decimal(6,2) DEFAULT NULL,
+  `rx_avg` decimal(6,2) GENERATED ALWAYS AS ((`rx_sum` / nullif(`rx_count`,0))) STORED,
+  `rtt_count` int NOT NULL DEFAULT '0',
+  `rtt_sum` decimal(14,2) NOT NULL DEFAULT '0.00',
+  `rtt_min` decimal(6,2) DEFAULT NULL,
+  `rtt_max` decimal(6,2) DEFAULT NULL,
+  `rtt_avg` decimal(6,2) GENERATED ALWAYS AS ((`rtt_sum` / nullif(`rtt_count`,0))) STORED,
+  `availability` decimal(5,2) GENERATED ALWAYS AS (((100 * `online_samples`) / nullif(`samples`,0))) STORED
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `onu_rollup_state`
+--
+
+CREATE TABLE `onu_rollup_state` (
+  `name` varchar(32) NOT NULL,
+  `last_id` bigint NOT NULL DEFAULT '0',
+  `updated_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `telegram_bot`
 --
@@ -160,6 +264,42 @@ ALTER TABLE `onu_log`
   ADD KEY `idx_rx_status` (`receive_power`,`created_at`),
   ADD KEY `idx_mac_created` (`macaddr`,`created_at`);
 
+--
+-- Indexes for table `onu_current`
+--
+ALTER TABLE `onu_current`
+  ADD PRIMARY KEY (`olt_id`,`macaddr`),
+  ADD KEY `idx_macaddr` (`macaddr`),
+  ADD KEY `idx_updated_at` (`updated_at`);
+
+--
+-- Indexes for table `onu_log_state`
+--
+ALTER TABLE `onu_log_state`
+  ADD PRIMARY KEY (`olt_id`,`macaddr`);
+
+--
+-- Indexes for table `onu_rollup_hourly`
+--
+ALTER TABLE `onu_rollup_hourly`
+  ADD PRIMARY KEY (`olt_id`,`macaddr`,`bucket`),
+  ADD KEY `idx_bucket_rx_min` (`bucket`,`rx_min`),
+  ADD KEY `idx_mac_bucket` (`macaddr`,`bucket`);
+
+--
+-- Indexes for table `onu_rollup_daily`
+--
+ALTER TABLE `onu_rollup_daily`
+  ADD PRIMARY KEY (`olt_id`,`macaddr`,`bucket`),
+  ADD KEY `idx_bucket_rx_min` (`bucket`,`rx_min`),
+  ADD KEY `idx_mac_bucket` (`macaddr`,`bucket`);
+
+--
+-- Indexes for table `onu_rollup_state`
+--
+ALTER TABLE `onu_rollup_state`
+  ADD PRIMARY KEY (`name`);
+
 --
 -- Indexes for table `telegram_bot`
 --
@@ -0,0 +1,56 @@
+--
+-- Schema berpartisi untuk `onu_log` dan `olt_logs`
+--
+-- Jalankan setelah db.sql pada instalasi baru (tabel masih kosong).
+-- Untuk database yang sudah berisi data gunakan migrate_partition.py
+-- (copy online per batch lalu RENAME TABLE).
+--
+-- Setelah itu jalankan partition_maintenance.py (cron harian) untuk
+-- membuat partisi ke depan, dan cleanup_onu_log.py --mode partition
+-- untuk retention (DROP PARTITION, tanpa DELETE per row).
+--
+
+SET SQL_MODE = "NO_AUTO_VALUE_ON_ZERO";
+SET time_zone = "+00:00";
+
+-- --------------------------------------------------------
+
+--
+-- Partisi harian untuk table `onu_log`
+--
+-- Index dipangkas ke query yang dipakai: idx_created_at untuk retention
+-- mode rows. State terakhir ONU dibaca dari `onu_current`, bukan onu_log.
+--
+
+ALTER TABLE `onu_log`
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`id`,`created_at`),
+  DROP INDEX `idx_macaddr`,
+  DROP INDEX `idx_olt_created`,
+  DROP INDEX `idx_rx_status`,
+  DROP INDEX `idx_mac_created`;
+
+ALTER TABLE `onu_log`
+  PARTITION BY RANGE COLUMNS(`created_at`) (
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+  );
+
+-- --------------------------------------------------------
+
+--
+-- Partisi bulanan untuk table `olt_logs`
+--
+-- RANGE COLUMNS tidak mendukung TIMESTAMP, created_at diubah ke DATETIME.
+-- idx_log_time tetap ada untuk retention mode rows dan query alarm collector.
+--
+
+ALTER TABLE `olt_logs`
+  MODIFY `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (`id`,`created_at`),
+  DROP INDEX `idx_hostname`;
+
+ALTER TABLE `olt_logs`
+  PARTITION BY RANGE COLUMNS(`created_at`) (
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+  );
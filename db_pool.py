@@ -0,0 +1,209 @@
+import time
+import queue
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import pymysql
+
+logger = logging.getLogger("DBPool")
+
+# ---------------- SETTING ----------------
+POOL_SIZE = 5
+PING_INTERVAL = 30      # detik idle sebelum koneksi di-ping ulang
+ACQUIRE_TIMEOUT = 10    # detik menunggu koneksi bebas
+
+# Error yang menandakan koneksi putus, koneksi dibuang lalu dibuat ulang
+CONNECTION_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+
+class DBPool:
+    """Pool koneksi pymysql thread-safe dengan health check dan reconnect"""
+
+    def __init__(self, config, size=POOL_SIZE, ping_interval=PING_INTERVAL):
+        self.config = dict(config)
+        self.size = size
+        self.ping_interval = ping_interval
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # ---------------- KONEKSI ----------------
+    def _connect(self):
+        return pymysql.connect(**self.config)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _acquire(self, timeout=ACQUIRE_TIMEOUT):
+        try:
+            conn, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                conn, last_used = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise pymysql.err.OperationalError(2013, "Timeout menunggu koneksi pool")
+
+        # health check koneksi yang sudah lama idle
+        if time.monotonic() - last_used > self.ping_interval:
+            try:
+                conn.ping(reconnect=True)
+            except Exception as e:
+                logger.warning(f"Koneksi pool mati, buat ulang: {e}")
+                self._discard(conn)
+                with self._lock:
+                    self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+        return conn
+
+    def _release(self, conn):
+        self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Pinjam satu koneksi dari pool"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except CONNECTION_ERRORS:
+            self._discard(conn)
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                self._discard(conn)
+            else:
+                self._release(conn)
+            raise
+        else:
+            # tutup transaksi baca yang masih terbuka, tanpa ini koneksi
+            # tanpa autocommit membawa snapshot REPEATABLE READ lama ke peminjam berikutnya
+            if not conn.get_autocommit():
+                try:
+                    conn.rollback()
+                except Exception:
+                    self._discard(conn)
+                    return
+            self._release(conn)
+
+    def run(self, func, *args, retries=1):
+        """Jalankan func(conn, *args), ulangi dengan koneksi baru jika koneksi putus"""
+        for attempt in range(retries + 1):
+            try:
+                with self.connection() as conn:
+                    return func(conn, *args)
+            except CONNECTION_ERRORS as e:
+                if attempt >= retries:
+                    raise
+                logger.warning(f"DB reconnect ({attempt + 1}/{retries}): {e}")
+
+    # ---------------- QUERY HELPER ----------------
+    def fetchone(self, sql, args=None):
+        def _query(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(sql, args)
+                return cursor.fetchone()
+        return self.run(_query)
+
+    def fetchall(self, sql, args=None):
+        def _query(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(sql, args)
+                return cursor.fetchall()
+        return self.run(_query)
+
+    def execute(self, sql, args=None):
+        """Eksekusi query tulis lalu commit, return jumlah row"""
+        def _query(conn):
+            with conn.cursor() as cursor:
+                affected = cursor.execute(sql, args)
+            conn.commit()
+            return affected
+        return self.run(_query)
+
+    def executemany(self, sql, rows):
+        """Insert banyak row dalam satu transaksi (multi-row INSERT oleh pymysql)"""
+        def _query(conn):
+            with conn.cursor() as cursor:
+                affected = cursor.executemany(sql, rows)
+            conn.commit()
+            return affected
+        return self.run(_query)
+
+    def ping(self):
+        try:
+            self.fetchone("SELECT 1")
+            return True
+        except Exception as e:
+            logger.warning(f"DB ping gagal: {e}")
+            return False
+
+    # ---------------- ASYNC ----------------
+    async def run_async(self, func, *args):
+        """Jalankan fungsi blocking (query DB) di thread pool milik pool ini"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="dbpool")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args))
+
+    async def fetchone_async(self, sql, args=None):
+        return await self.run_async(self.fetchone, sql, args)
+
+    async def fetchall_async(self, sql, args=None):
+        return await self.run_async(self.fetchall, sql, args)
+
+    async def execute_async(self, sql, args=None):
+        return await self.run_async(self.execute, sql, args)
+
+    async def executemany_async(self, sql, rows):
+        return await self.run_async(self.executemany, sql, rows)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config, size=POOL_SIZE):
+    """Ambil pool bersama untuk config DB yang sama, dibuat saat pertama dipakai"""
+    key = repr(sorted(config.items(), key=lambda item: item[0]))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = DBPool(config, size=size)
+            _pools[key] = pool
+        return pool
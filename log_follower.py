@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from metrics import counter, histogram
+
+logger = logging.getLogger("LogFollower")
+
+# ---------------- SETTING ----------------
+READ_CHUNK = 1024 * 1024        # byte per read, backlog dibaca per blok bukan per baris
+POLL_INTERVAL = 0.2             # detik menunggu data baru saat EOF
+ROTATED_SUFFIXES = (".1",)      # nama file hasil logrotate yang dicari saat inode berubah
+
+READ_SECONDS = histogram("olt_bot_log_read_seconds", "Durasi baca satu blok log yang berisi data")
+READ_BYTES = counter("olt_bot_log_read_bytes_total", "Byte log yang sudah dibaca")
+
+
+class Checkpoint:
+    """Simpan checkpoint kecil (JSON) secara atomik"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Checkpoint {self.path} tidak terbaca, mulai dari akhir log: {e}")
+            return {}
+
+    def save(self, data):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+class LineTracker:
+    """
+    Lacak baris yang sudah dibaca tapi belum selesai diproses (masih di antrian,
+    ditahan aggregator, atau belum masuk outbox/writer). Checkpoint memakai awal
+    baris tertua yang belum selesai, jadi setelah crash/restart baris tersebut
+    dibaca ulang (at-least-once) dan tidak ada yang hilang.
+    """
+
+    def __init__(self):
+        self._pending = OrderedDict()   # token -> (inode, offset awal baris), urut baca
+        self._next = 0
+
+    def add(self, inode, offset):
+        token = self._next
+        self._next += 1
+        self._pending[token] = (inode, offset)
+        return token
+
+    def done(self, *tokens):
+        for token in tokens:
+            self._pending.pop(token, None)
+
+    def position(self, read_position):
+        """Posisi checkpoint: baris tertua yang belum selesai, atau posisi baca jika semua selesai"""
+        if not self._pending:
+            return read_position
+        inode, offset = next(iter(self._pending.values()))
+        return {"inode": inode, "offset": offset}
+
+    def __len__(self):
+        return len(self._pending)
+
+
+class LogFollower:
+    """
+    Pengganti `tail -F` yang bisa dilanjutkan: posisi disimpan sebagai
+    (inode, offset) baris utuh terakhir. Saat start tanpa posisi mulai dari
+    akhir file (seperti tail -n0), dengan posisi lanjut dari offset tersebut,
+    termasuk sisa file lama jika log sudah di-rotate.
+    """
+
+    def __init__(self, path, inode=None, offset=None, chunk_size=READ_CHUNK, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.inode = inode
+        self.offset = offset
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.catching_up = False
+        self._file = None
+        self._buffer = b""
+
+    def position(self):
+        """Posisi baris utuh terakhir yang sudah dibaca (lihat LineTracker untuk checkpoint)"""
+        return {"inode": self.inode, "offset": self.offset}
+
+    def _open(self, path, inode, offset):
+        if self._file is not None:
+            self._file.close()
+        self._file = open(path, "rb")
+        self._file.seek(offset)
+        self._buffer = b""
+        self.inode = inode
+        self.offset = offset
+
+    def _open_initial(self):
+        st = os.stat(self.path)
+
+        if self.inode is None or self.offset is None:
+            self._open(self.path, st.st_ino, st.st_size)
+            return
+
+        if st.st_ino == self.inode and self.offset <= st.st_size:
+            backlog = st.st_size - self.offset
+            logger.info(f"Lanjut dari offset {self.offset}, backlog {backlog} byte")
+            self.catching_up = backlog > 0
+            self._open(self.path, st.st_ino, self.offset)
+            return
+
+        # log sudah di-rotate selama bot mati, baca sisa file lama lebih dulu
+        for suffix in ROTATED_SUFFIXES:
+            rotated = self.path + suffix
+            try:
+                rotated_st = os.stat(rotated)
+            except FileNotFoundError:
+                continue
+            if rotated_st.st_ino == self.inode and self.offset <= rotated_st.st_size:
+                logger.info(f"Log sudah di-rotate, lanjut dari {rotated} offset {self.offset}")
+                self.catching_up = True
+                self._open(rotated, self.inode, self.offset)
+                return
+
+        logger.warning(f"File log lama tidak ditemukan, baca {self.path} dari awal")
+        self.catching_up = st.st_size > 0
+        self._open(self.path, st.st_ino, 0)
+
+    def _read(self):
+        return self._file.read(self.chunk_size)
+
+    def _rotation(self):
+        """Cek rotasi/truncate setelah EOF: ("rotate" | "truncate", stat) atau None"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        if st.st_ino != self.inode:
+            return "rotate", st
+        if st.st_size < self.offset:
+            return "truncate", st
+        return None
+
+    def _take_partial(self):
+        """Sisa baris tanpa newline di file lama sebagai (offset, baris), None jika kosong"""
+        if not self._buffer:
+            return None
+        partial = (self.offset, self._buffer.decode(errors="replace"))
+        self.offset += len(self._buffer)
+        self._buffer = b""
+        return partial
+
+    async def batches(self):
+        """
+        Yield list (offset, baris) per blok yang dibaca, offset = awal baris di file
+        self.inode saat itu. List kosong saat menunggu data baru.
+        """
+        while self._file is None:
+            try:
+                self._open_initial()
+            except FileNotFoundError:
+                logger.warning(f"{self.path} belum ada, tunggu...")
+                await asyncio.sleep(1)
+
+        drained = False
+        try:
+            while True:
+                started = time.perf_counter()
+                data = await asyncio.to_thread(self._read)
+                if data:
+                    READ_SECONDS.observe(time.perf_counter() - started)
+                    READ_BYTES.inc(len(data))
+                    chunk = self._buffer + data
+                    end = chunk.rfind(b"\n") + 1
+                    self._buffer = chunk[end:]
+                    if end:
+                        offset = self.offset
+                        self.offset += end
+                        lines = []
+                        for line in chunk[:end].splitlines(True):
+                            lines.append((offset, line.decode(errors="replace")))
+                            offset += len(line)
+                        yield lines
+                    continue
+
+                rotation = self._rotation()
+                if rotation:
+                    kind, st = rotation
+                    if kind == "rotate" and not drained:
+                        # rsyslog masih bisa menulis ke file lama sebelum rename terlihat,
+                        # baca file lama sampai EOF sekali lagi sebelum pindah
+                        drained = True
+                        continue
+
+                    partial = self._take_partial()
+                    if partial:
+                        yield [partial]
+                    if kind == "rotate":
+                        logger.info(f"{self.path} di-rotate, buka file baru")
+                    else:
+                        logger.warning(f"{self.path} di-truncate, baca dari awal")
+                    self._open(self.path, st.st_ino, 0)
+                    drained = False
+                    continue
+
+                if self.catching_up:
+                    self.catching_up = False
+                    logger.info("Backlog log selesai dibaca")
+
+                yield []
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,82 @@
+import re
+import time
+from typing import NamedTuple, Optional
+
+# Contoh baris:
+# Jan  2 19:46:01 10.10.10.1 OLT-HSGQ: [EPON] Info: ONU 3/12 Port 1 aa:bb:cc:dd:ee:ff Dying gasp
+LOG_PATTERN = re.compile(
+    r'^(\w+\s+\d+\s+\d+:\d+:\d+)\s+'                        # waktu OLT
+    r'(\S+)\s+'                                             # gateway / IP OLT
+    r'([^:]+):\s+'                                          # nama OLT
+    r'\[[^\]]+\]\s+'
+    r'Info:\s+'
+    r'(ONU\s+(\d+)/(\d+)(?:\s+Port\s+(\d+))?\s+([0-9a-f:]+))\s+'  # onu_info: pon/slot, port, MAC
+    r'(.*)$'                                                # status
+)
+
+
+class LogRecord(NamedTuple):
+    waktu_server: str
+    waktu_olt: str
+    olt: str
+    olt_ip: str
+    onu_info: str
+    status: str
+    mac: Optional[str]
+    pon: int
+    slot: int
+    port: Optional[int]
+    raw_log: str
+
+
+_server_time = [0, ""]
+
+def get_server_time():
+    """Dapatkan waktu server yang sudah diformat (di-cache per detik)"""
+    now = int(time.time())
+    if now != _server_time[0]:
+        _server_time[0] = now
+        _server_time[1] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+    return _server_time[1]
+
+
+def parse_log_time(waktu, now=None):
+    """Epoch dari timestamp syslog tanpa tahun ("Jan  2 19:46:01"), None jika tidak valid"""
+    now = time.time() if now is None else now
+    year = time.localtime(now).tm_year
+    try:
+        logged = time.mktime(time.strptime(f"{year} {waktu}", "%Y %b %d %H:%M:%S"))
+        # log Desember yang dibaca setelah pergantian tahun
+        if logged > now + 86400:
+            logged = time.mktime(time.strptime(f"{year - 1} {waktu}", "%Y %b %d %H:%M:%S"))
+    except ValueError:
+        return None
+    return logged
+
+
+def parse_log_line(line):
+    """Parse log line jadi LogRecord, None jika bukan log status ONU"""
+    # pre-filter murah sebelum regex, mayoritas syslog bukan log ONU
+    if 'ONU' not in line or 'Info:' not in line:
+        return None
+
+    line = line.strip()
+    match = LOG_PATTERN.match(line)
+    if not match:
+        return None
+
+    waktu, gateway_or_ip, olt_name, onu_info, pon, slot, port, mac, status = match.groups()
+
+    return LogRecord(
+        waktu_server=get_server_time(),
+        waktu_olt=waktu,
+        olt=f"{gateway_or_ip} {olt_name}".strip(),
+        olt_ip=gateway_or_ip,
+        onu_info=onu_info,
+        status=status.strip(),
+        mac=mac if len(mac) == 17 else None,
+        pon=int(pon),
+        slot=int(slot),
+        port=int(port) if port else None,
+        raw_log=line
+    )
@@ -0,0 +1,41 @@
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# ---------------- SETTING ----------------
+# Level bisa diatur lewat env OLT_LOG_LEVEL (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = os.environ.get("OLT_LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener = None
+
+
+def setup_logging(level=None, fmt=LOG_FORMAT):
+    """Logging bersama: record masuk antrian, ditulis ke stderr oleh thread QueueListener"""
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(fmt))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel((level or LOG_LEVEL).upper())
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush sisa log di antrian (dipanggil otomatis saat exit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
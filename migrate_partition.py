@@ -0,0 +1,195 @@
+import time
+import logging
+import argparse
+from log_setup import setup_logging
+from db_pool import get_pool
+from partition_maintenance import PARTITION_TABLES, PARTITIONS_AHEAD, add_future_partitions
+
+# ---------------- LOGGING ----------------
+logger = logging.getLogger("PartitionMigration")
+
+# ---------------- DB CONFIG ----------------
+DB_CONFIG = {
+    "host": "127.0.0.1",
+    "user": "",
+    "password": "",
+    "database": "db_mng_olt",
+    "autocommit": True
+}
+
+# ---------------- SETTING ----------------
+BATCH_SIZE = 10000      # rentang id per INSERT ... SELECT
+BATCH_SLEEP = 0.1       # detik jeda antar batch
+ID_GAP = 100000         # jarak AUTO_INCREMENT tabel baru dari MAX(id) lama saat swap
+
+# Perubahan schema per tabel: primary key harus memuat kolom partisi dan index
+# dipangkas ke query yang benar-benar dipakai. onu_log.idx_created_at dan
+# olt_logs.idx_log_time tetap ada: dipakai retention mode rows (get_id_range),
+# olt_logs juga oleh query alarm collector. State per MAC dibaca dari onu_current.
+SCHEMA_CHANGES = {
+    "onu_log": """
+        DROP PRIMARY KEY,
+        ADD PRIMARY KEY (id, created_at),
+        DROP INDEX idx_macaddr,
+        DROP INDEX idx_olt_created,
+        DROP INDEX idx_rx_status,
+        DROP INDEX idx_mac_created
+    """,
+    # RANGE COLUMNS tidak mendukung TIMESTAMP, created_at diubah ke DATETIME
+    "olt_logs": """
+        MODIFY created_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        DROP PRIMARY KEY,
+        ADD PRIMARY KEY (id, created_at),
+        DROP INDEX idx_hostname
+    """,
+}
+
+# Ekspresi SELECT pengganti per kolom saat copy. olt_logs.created_at dulu
+# nullable, sedangkan kolom partisi NOT NULL: isi dari log_time.
+COPY_OVERRIDES = {
+    "olt_logs": {"created_at": "COALESCE(created_at, log_time, NOW())"},
+}
+
+
+# ---------------- STEP ----------------
+def table_exists(cur, table):
+    cur.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return cur.fetchone()[0] > 0
+
+
+def create_partitioned_copy(conn, table, new_table, period, ahead):
+    """Buat tabel baru berpartisi dengan struktur kolom sama seperti tabel lama"""
+    cur = conn.cursor()
+    try:
+        cur.execute(f"SELECT MIN(created_at) FROM {table}")
+        oldest = cur.fetchone()[0]
+
+        cur.execute(f"CREATE TABLE {new_table} LIKE {table}")
+        cur.execute(f"ALTER TABLE {new_table} {SCHEMA_CHANGES[table]}")
+        cur.execute(f"""
+            ALTER TABLE {new_table}
+            PARTITION BY RANGE COLUMNS(created_at) (
+                PARTITION pmax VALUES LESS THAN (MAXVALUE)
+            )
+        """)
+    finally:
+        cur.close()
+
+    add_future_partitions(conn, new_table, period, ahead, since=oldest)
+    logger.info(f"[{table}] Tabel {new_table} dibuat, partisi {period} sejak {oldest}")
+
+
+def copy_columns(conn, table, overrides=None):
+    """Daftar kolom INSERT dan ekspresi SELECT yang sesuai urutan kolom tabel"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COLUMN_NAME
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION
+        """, (table,))
+        columns = [row[0] for row in cur.fetchall()]
+    overrides = overrides or {}
+    insert_list = ", ".join(f"`{column}`" for column in columns)
+    select_list = ", ".join(overrides.get(column, f"`{column}`") for column in columns)
+    return insert_list, select_list
+
+
+def copy_range(conn, table, new_table, from_id, to_id, batch_size, sleep, columns):
+    """Salin row id (from_id, to_id] per batch, return id terakhir yang tersalin"""
+    insert_list, select_list = columns
+    cur = conn.cursor()
+    try:
+        started = time.monotonic()
+        copied = 0
+        lo = from_id
+        while lo < to_id:
+            hi = min(lo + batch_size, to_id)
+            # INSERT biasa (bukan IGNORE): konversi diam-diam / duplikat harus gagal
+            copied += cur.execute(f"""
+                INSERT INTO {new_table} ({insert_list})
+                SELECT {select_list} FROM {table}
+                WHERE id > %s AND id <= %s
+            """, (lo, hi))
+            lo = hi
+
+            elapsed = time.monotonic() - started
+            progress = (lo - from_id) * 100 / (to_id - from_id)
+            logger.info(f"[{table}] Copy {progress:.1f}% (id {lo}/{to_id}), {copied} row, {copied / elapsed if elapsed else 0:.0f} rows/s")
+            if sleep:
+                time.sleep(sleep)
+        return lo
+    finally:
+        cur.close()
+
+
+def max_id(conn, table):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        return cur.fetchone()[0]
+
+
+def migrate(conn, table, period, ahead=PARTITIONS_AHEAD, batch_size=BATCH_SIZE, sleep=BATCH_SLEEP):
+    """Salin tabel ke versi berpartisi secara online lalu swap dengan RENAME TABLE"""
+    new_table = f"{table}_part"
+    old_table = f"{table}_old"
+
+    with conn.cursor() as cur:
+        if table_exists(cur, old_table):
+            raise Exception(f"{old_table} sudah ada, hapus dulu sebelum migrasi ulang")
+        resume = table_exists(cur, new_table)
+
+    if resume:
+        logger.info(f"[{table}] {new_table} sudah ada, lanjutkan copy")
+    else:
+        create_partitioned_copy(conn, table, new_table, period, ahead)
+
+    columns = copy_columns(conn, table, COPY_OVERRIDES.get(table))
+
+    # copy bulk lalu kejar row baru sampai sisa kurang dari satu batch
+    copied_to = max_id(conn, new_table)
+    while True:
+        target = max_id(conn, table)
+        if target - copied_to <= batch_size:
+            break
+        copied_to = copy_range(conn, table, new_table, copied_to, target, batch_size, sleep, columns)
+
+    # id tabel baru dimulai di atas id lama agar row yang masuk saat swap tidak bentrok
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE {new_table} AUTO_INCREMENT = %s", (max_id(conn, table) + ID_GAP,))
+        cur.execute(f"RENAME TABLE {table} TO {old_table}, {new_table} TO {table}")
+    logger.info(f"[{table}] Swap selesai, {table} sekarang berpartisi")
+
+    # sisa row yang masuk ke tabel lama sebelum swap
+    final_to = max_id(conn, old_table)
+    if final_to > copied_to:
+        copy_range(conn, old_table, table, copied_to, final_to, batch_size, 0, columns)
+
+    logger.info(f"[{table}] Migrasi selesai, cek data lalu DROP TABLE {old_table}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Migrasi onu_log / olt_logs ke schema berpartisi")
+    parser.add_argument("--table", required=True, choices=sorted(PARTITION_TABLES))
+    parser.add_argument("--ahead", type=int, default=PARTITIONS_AHEAD)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=BATCH_SLEEP)
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+    try:
+        with get_pool(DB_CONFIG, size=1).connection() as conn:
+            migrate(conn, args.table, PARTITION_TABLES[args.table], args.ahead, args.batch_size, args.sleep)
+    except Exception as e:
+        logger.error(f"Gagal migrasi {args.table}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import counter, histogram
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+logger = logging.getLogger("OLTClient")
+
+# ---------------- SETTING ----------------
+LOGIN_TIMEOUT = 10
+HTTP_POOL_SIZE = 8      # koneksi keep-alive per OLT
+MAX_CLIENTS = 64        # client (session + token) yang disimpan, per IP + kredensial
+
+# Trigger /onu_allow_list sebelum /onutable:
+#   "once"     = satu request per OLT (cukup untuk firmware yang URL-nya sama per port)
+#   "per_port" = satu request per PON port, dikirim paralel
+#   "off"      = tidak di-trigger
+ALLOW_LIST_MODE = "once"
+ALLOW_LIST_MODE_OVERRIDES = {}  # {"ip_olt": "per_port"} untuk firmware yang butuh per port
+ALLOW_LIST_TIMEOUT = 5
+STREAM_CHUNK_SIZE = 64 * 1024   # byte per chunk iter_content saat stream /onutable
+
+HTTP_STEP_SECONDS = histogram("olt_http_step_seconds", "Durasi step scrape HTTP per OLT", ("olt", "step"))
+LOGINS = counter("olt_http_logins_total", "Login baru ke OLT (token kosong/ditolak)", ("olt",))
+
+
+class OLTAuthError(Exception):
+    pass
+
+class OLTConnectionError(Exception):
+    pass
+
+
+def remaining_timeout(default: float, deadline: float = None) -> float:
+    """Timeout request dipotong sisa waktu deadline OLT"""
+    if deadline is None:
+        return default
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("OLT deadline exceeded")
+    return min(default, remaining)
+
+def safe_json(resp: requests.Response) -> Dict[str, Any]:
+    """Safely parse JSON response with error handling"""
+    try:
+        if resp.status_code != 200:
+            return {
+                "error": f"HTTP Error {resp.status_code}",
+                "status_code": resp.status_code,
+                "text": resp.text[:200]
+            }
+        return resp.json()
+    except ValueError as e:
+        return {"error": f"JSON Parse Error: {str(e)}", "raw": resp.text[:200], "status_code": resp.status_code}
+    except Exception as e:
+        return {"error": f"Unexpected Error: {str(e)}", "status_code": resp.status_code}
+
+
+class IterContentReader:
+    """File-like di atas resp.iter_content, supaya ijson bisa membaca body bertahap"""
+
+    def __init__(self, resp, chunk_size=STREAM_CHUNK_SIZE):
+        self._chunks = resp.iter_content(chunk_size)
+        self._buffer = b""
+
+    def read(self, size=-1):
+        # backend C ijson memotong data yang melebihi size, sisa chunk disimpan
+        if not self._buffer:
+            self._buffer = next(self._chunks, b"")
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class OLTClient:
+    """Client HTTP satu OLT: session keep-alive + X-Token yang dipakai ulang"""
+
+    def __init__(self, olt_ip: str, username: str, password: str):
+        self.olt_ip = olt_ip
+        self.username = username
+        self.password = password
+        self.token = None
+        self.login_data = None
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE))
+        self._lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"http://{self.olt_ip}{path}"
+
+    # ---------------- AUTH ----------------
+    def login(self, timeout: float = LOGIN_TIMEOUT) -> Dict[str, Any]:
+        """Login ke OLT dan simpan X-Token"""
+        # password di-encode base64, key = md5(username:password)
+        password_b64 = base64.b64encode(self.password.encode()).decode()
+        key = hashlib.md5(f"{self.username}:{self.password}".encode()).hexdigest()
+
+        payload = {
+            "method": "set",
+            "param": {
+                "name": self.username,
+                "key": key,
+                "value": password_b64,
+                "captcha_v": "",
+                "captcha_f": ""
+            }
+        }
+
+        try:
+            resp = self.session.post(self.url("/userlogin?form=login"), json=payload, timeout=timeout)
+        except requests.exceptions.Timeout:
+            raise OLTConnectionError("Login timeout - OLT not responding")
+        except requests.exceptions.ConnectionError:
+            raise OLTConnectionError("Connection failed - check OLT IP address")
+        except requests.exceptions.RequestException as e:
+            raise OLTConnectionError(f"Network error: {str(e)}")
+
+        login_data = safe_json(resp)
+        if login_data.get("code") != 1:
+            raise OLTAuthError(f"Login failed: {login_data.get('message', 'Unknown error')}")
+
+        x_token = resp.headers.get("X-Token")
+        if not x_token:
+            raise OLTAuthError("No X-Token received in login response")
+
+        self.token = x_token
+        self.login_data = login_data
+        LOGINS.inc(olt=self.olt_ip)
+        logger.debug(f"Login baru ke {self.olt_ip}")
+        return login_data
+
+    def ensure_login(self, timeout: float = LOGIN_TIMEOUT) -> str:
+        """Login hanya jika belum ada token"""
+        with self._lock:
+            if self.token is None:
+                self.login(timeout)
+            return self.token
+
+    def invalidate(self, token: str):
+        with self._lock:
+            if self.token == token:
+                self.token = None
+
+    # ---------------- REQUEST ----------------
+    def _send(self, method: str, path: str, timeout: float, **kwargs) -> requests.Response:
+        token = self.ensure_login(min(timeout, LOGIN_TIMEOUT))
+        resp = self.session.request(method, self.url(path), headers={"X-Token": token}, timeout=timeout, **kwargs)
+        resp.olt_token = token
+        return resp
+
+    def request(self, method: str, path: str, timeout: float = 10, **kwargs) -> requests.Response:
+        """Request dengan X-Token cache, login ulang sekali jika dapat 401"""
+        resp = self._send(method, path, timeout, **kwargs)
+        if resp.status_code == 401:
+            logger.info(f"Token {self.olt_ip} ditolak (401), login ulang")
+            self.invalidate(resp.olt_token)
+            # kembalikan koneksi ke pool dulu, dengan stream=True body 401 belum dibaca
+            resp.close()
+            resp = self._send(method, path, timeout, **kwargs)
+        return resp
+
+    def get(self, path: str, timeout: float = 10, **kwargs) -> requests.Response:
+        return self.request("GET", path, timeout=timeout, **kwargs)
+
+    def get_json(self, path: str, timeout: float = 10) -> Dict[str, Any]:
+        """GET + parse JSON, login ulang sekali jika balasan code != 1"""
+        resp = self.get(path, timeout=timeout)
+        data = safe_json(resp)
+        if isinstance(data, dict) and "code" in data and data["code"] != 1:
+            logger.info(f"Token {self.olt_ip} ditolak (code={data['code']}), login ulang")
+            self.invalidate(resp.olt_token)
+            data = safe_json(self.get(path, timeout=timeout))
+        return data
+
+    # ---------------- FETCH ----------------
+    def trigger_allow_list(self, port_ids, mode: str = None, deadline: float = None) -> int:
+        """Trigger /onu_allow_list sesuai mode, return jumlah request yang dikirim"""
+        if mode is None:
+            mode = ALLOW_LIST_MODE_OVERRIDES.get(self.olt_ip, ALLOW_LIST_MODE)
+        if mode == "off" or not port_ids:
+            return 0
+
+        def _trigger(_port_id):
+            try:
+                ts = int(time.time() * 1000)
+                self.get(f"/onu_allow_list?t={ts}", timeout=remaining_timeout(ALLOW_LIST_TIMEOUT, deadline))
+            except Exception as e:
+                logger.debug(f"onu_allow_list {self.olt_ip} gagal: {e}")
+
+        if mode == "once":
+            _trigger(None)
+            return 1
+
+        with ThreadPoolExecutor(max_workers=min(len(port_ids), HTTP_POOL_SIZE)) as executor:
+            list(executor.map(_trigger, port_ids))
+        return len(port_ids)
+
+    def fetch_snapshot(self, deadline: float = None, allow_list_mode: str = None,
+                       timings: Dict[str, float] = None, include_onutable: bool = True) -> Dict[str, Any]:
+        """
+        Ambil system, board (+ allow list) dan onutable dengan timing per step.
+        include_onutable=False untuk pemanggil yang membaca onutable lewat iter_onutable.
+        """
+        if timings is None:
+            timings = {}
+        snapshot = {"system": {}, "board": {}, "onutable": {}, "timings": timings}
+
+        started = time.monotonic()
+        self.ensure_login(remaining_timeout(LOGIN_TIMEOUT, deadline))
+        timings["login"] = time.monotonic() - started
+
+        started = time.monotonic()
+        try:
+            snapshot["system"] = self.get_json("/system?form=hostname", timeout=remaining_timeout(10, deadline))
+        except Exception as e:
+            logger.warning(f"Failed to get system info from {self.olt_ip}: {e}")
+            snapshot["system"] = {"error": str(e)}
+        timings["system"] = time.monotonic() - started
+
+        started = time.monotonic()
+        try:
+            snapshot["board"] = self.get_json("/board?info=pon", timeout=remaining_timeout(10, deadline))
+        except Exception as e:
+            logger.warning(f"Failed to get board info from {self.olt_ip}: {e}")
+            snapshot["board"] = {"error": str(e)}
+        timings["board"] = time.monotonic() - started
+
+        started = time.monotonic()
+        ports = snapshot["board"].get("data") or []
+        port_ids = [p.get("port_id") for p in ports if isinstance(p, dict)]
+        snapshot["allow_list_requests"] = self.trigger_allow_list(port_ids, allow_list_mode, deadline)
+        timings["allow_list"] = time.monotonic() - started
+
+        if include_onutable:
+            started = time.monotonic()
+            try:
+                snapshot["onutable"] = self.get_json("/onutable", timeout=remaining_timeout(15, deadline))
+            except Exception as e:
+                logger.error(f"Failed to get ONU data from {self.olt_ip}: {e}")
+                snapshot["onutable"] = {"error": str(e)}
+            timings["onutable"] = time.monotonic() - started
+
+        for step in ("login", "system", "board", "allow_list", "onutable"):
+            if step in timings:
+                HTTP_STEP_SECONDS.observe(timings[step], olt=self.olt_ip, step=step)
+        return snapshot
+
+    def iter_onutable(self, deadline: float = None, timings: Dict[str, float] = None, timeout: float = 15):
+        """
+        Generator record ONU dari /onutable. Dengan ijson array `data` di-parse
+        bertahap dari iter_content, jadi body tidak pernah utuh di memori;
+        tanpa ijson fallback ke resp.json(). Login ulang sekali jika code != 1,
+        OLTAuthError jika masih ditolak.
+        Waktu step onutable termasuk waktu konsumen memproses tiap record.
+        """
+        started = time.monotonic()
+        try:
+            for attempt in range(2):
+                resp = self.get("/onutable", timeout=remaining_timeout(timeout, deadline), stream=True)
+                try:
+                    if resp.status_code != 200:
+                        raise OLTConnectionError(f"HTTP Error {resp.status_code}")
+                    header = {}
+                    count = 0
+                    for onu in self._parse_onutable(resp, header):
+                        if deadline is not None and time.monotonic() > deadline:
+                            raise TimeoutError("OLT deadline exceeded")
+                        count += 1
+                        yield onu
+                finally:
+                    resp.close()
+
+                if count or header.get("code", 1) == 1:
+                    return
+                if attempt == 0:
+                    logger.info(f"Token {self.olt_ip} ditolak (code={header['code']}), login ulang")
+                    self.invalidate(resp.olt_token)
+                else:
+                    # jangan selesai diam-diam: snapshot kosong akan ter-commit sebagai 0 ONU
+                    raise OLTAuthError(f"onutable ditolak (code={header['code']}): {header.get('message', '')}")
+        finally:
+            if timings is not None:
+                timings["onutable"] = time.monotonic() - started
+            HTTP_STEP_SECONDS.observe(time.monotonic() - started, olt=self.olt_ip, step="onutable")
+
+    @staticmethod
+    def _parse_onutable(resp, header):
+        """Yield tiap item `data`, field code/message disimpan ke header"""
+        if not HAS_IJSON:
+            data = resp.json()
+            if isinstance(data, dict):
+                header.update({key: data[key] for key in ("code", "message") if key in data})
+                yield from data.get("data") or []
+            return
+
+        builder = None
+        for prefix, event, value in ijson.parse(IterContentReader(resp), use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == "data.item" and event == "end_map":
+                    yield builder.value
+                    builder = None
+            elif prefix == "data.item" and event == "start_map":
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            elif prefix in ("code", "message"):
+                header[prefix] = value
+
+    def close(self):
+        self.session.close()
+
+
+_clients = OrderedDict()    # (ip, username, password) -> OLTClient, urutan LRU
+_clients_lock = threading.Lock()
+
+
+def get_client(olt_ip: str, username: str, password: str) -> OLTClient:
+    """
+    Ambil client bersama per (IP, kredensial). Kredensial berbeda mendapat
+    session sendiri, jadi request yang masih berjalan tidak pernah kehilangan
+    session-nya. Client terlama dibuang saat melebihi MAX_CLIENTS tanpa
+    close(): session dilepas ke GC setelah request yang memakainya selesai.
+    """
+    key = (olt_ip, username, password)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = OLTClient(olt_ip, username, password)
+            while len(_clients) > MAX_CLIENTS:
+                _clients.popitem(last=False)
+        else:
+            _clients.move_to_end(key)
+        return client
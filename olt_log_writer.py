@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from metrics import histogram
+
+logger = logging.getLogger("OltLogWriter")
+
+# ---------------- SETTING ----------------
+WRITER_BATCH_SIZE = 200         # flush jika buffer mencapai jumlah ini
+WRITER_FLUSH_INTERVAL = 0.5     # detik, flush berkala walau batch belum penuh
+WRITER_MAX_BUFFER = 10000       # lewat batas ini row terlama ditulis ke disk
+WRITER_SPILL_PATH = "/var/lib/olt-bot/olt_logs_spill.jsonl"
+
+FLUSH_SECONDS = histogram("olt_logs_insert_seconds", "Durasi satu batch multi-row INSERT olt_logs")
+
+INSERT_OLT_LOGS_SQL = """
+    INSERT INTO olt_logs (raw_log, log_time, hostname, mac_address)
+    VALUES (%s, %s, %s, %s)
+"""
+
+
+class OltLogWriter:
+    """
+    Writer background untuk olt_logs: record dikumpulkan di memori lalu di-insert
+    multi-row tiap WRITER_BATCH_SIZE row atau WRITER_FLUSH_INTERVAL detik.
+    Saat MySQL tidak tersedia buffer dibatasi, kelebihannya disimpan ke file
+    spill dan dimasukkan ulang setelah DB kembali normal.
+    """
+
+    def __init__(self, db, batch_size=WRITER_BATCH_SIZE, flush_interval=WRITER_FLUSH_INTERVAL,
+                 max_buffer=WRITER_MAX_BUFFER, spill_path=WRITER_SPILL_PATH):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self.stats = defaultdict(int)
+        self._buffer = []
+        self._wakeup = asyncio.Event()
+
+    def add(self, raw_log, log_time, hostname, mac_address):
+        """Antrikan satu row olt_logs, tidak pernah menunggu DB"""
+        self._buffer.append((raw_log, log_time, hostname, mac_address))
+        if len(self._buffer) > self.max_buffer:
+            # tulis ke disk per batch agar file tidak dibuka untuk tiap row
+            overflow = len(self._buffer) - self.max_buffer + self.batch_size
+            self._spill(self._buffer[:overflow])
+            del self._buffer[:overflow]
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def run(self):
+        """Loop flush berkala"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Insert isi buffer per batch, return False jika DB gagal"""
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            started = time.perf_counter()
+            try:
+                await self.db.executemany_async(INSERT_OLT_LOGS_SQL, batch)
+                FLUSH_SECONDS.observe(time.perf_counter() - started)
+            except Exception as e:
+                # kembalikan ke depan buffer, dicoba lagi pada flush berikutnya
+                self._buffer[:0] = batch
+                self.stats["errors"] += 1
+                logger.error(f"Gagal insert {len(batch)} row olt_logs: {e}")
+                return False
+            self.stats["inserted"] += len(batch)
+            self.stats["batches"] += 1
+
+        await self._replay_spill()
+        return True
+
+    async def close(self):
+        """Flush terakhir saat shutdown, sisa yang gagal disimpan ke file spill"""
+        if not await self.flush() and self._buffer:
+            self._spill(self._buffer)
+            self._buffer = []
+
+    # ---------------- SPILL ----------------
+    def _spill(self, rows):
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        self.stats["spilled"] += len(rows)
+        logger.warning(f"{len(rows)} row olt_logs disimpan ke {self.spill_path}")
+
+    async def _replay_spill(self):
+        """Masukkan ulang file spill setelah DB kembali normal"""
+        # rename dulu agar spill baru selama replay masuk ke file terpisah
+        replay_path = self.spill_path + ".replay"
+        if not os.path.exists(replay_path):
+            if not os.path.exists(self.spill_path):
+                return
+            os.replace(self.spill_path, replay_path)
+
+        with open(replay_path, encoding="utf-8") as f:
+            rows = [tuple(json.loads(line)) for line in f if line.strip()]
+
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            try:
+                await self.db.executemany_async(INSERT_OLT_LOGS_SQL, batch)
+            except Exception as e:
+                # simpan sisa yang belum masuk, dicoba lagi pada flush berikutnya
+                with open(replay_path, "w", encoding="utf-8") as f:
+                    for row in rows[i:]:
+                        f.write(json.dumps(row) + "\n")
+                logger.error(f"Replay spill olt_logs gagal: {e}")
+                return
+            self.stats["replayed"] += len(batch)
+
+        os.remove(replay_path)
+        logger.info(f"{len(rows)} row olt_logs dari file spill berhasil di-insert")
@@ -0,0 +1,125 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("ONUCache")
+
+# ---------------- SETTING ----------------
+CACHE_MAX_SIZE = 50000
+CACHE_TTL = 6 * 3600        # detik, entry lebih tua dianggap miss
+
+# Sumber cache: onu_current (state terakhir per ONU, di-upsert onu_cronjob)
+CACHE_COLUMNS = """
+    macaddr, onu_name, last_receive_power AS receive_power,
+    olt_id, olt_ip, olt_hostname, port_id, updated_at
+"""
+
+
+class OnuCache:
+    """Cache state terakhir ONU (nama, RX, OLT, port) berdasarkan MAC, LRU + TTL"""
+
+    def __init__(self, max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.last_updated = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, mac):
+        with self._lock:
+            entry = self._entries.get(mac)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            data, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[mac]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(mac)
+            self.hits += 1
+            return data
+
+    def put(self, mac, data):
+        with self._lock:
+            self._store(mac, data)
+
+    def _store(self, mac, data):
+        old = self._entries.pop(mac, None)
+        if old is not None:
+            # nama / RX kosong di row baru tidak menimpa nilai lama
+            merged = dict(old[0])
+            for key, value in data.items():
+                if value is not None and value != "":
+                    merged[key] = value
+            data = merged
+
+        self._entries[mac] = (data, time.monotonic())
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _apply_rows(self, rows):
+        with self._lock:
+            for row in rows:
+                self._store(row['macaddr'], {
+                    'onu_name': row['onu_name'],
+                    'receive_power': row['receive_power'],
+                    'olt_id': row['olt_id'],
+                    'olt_ip': row['olt_ip'],
+                    'olt_hostname': row['olt_hostname'],
+                    'port_id': row['port_id'],
+                })
+                if self.last_updated is None or row['updated_at'] > self.last_updated:
+                    self.last_updated = row['updated_at']
+
+    # ---------------- LOAD / REFRESH ----------------
+    def warm_load(self, db):
+        """Isi cache dari onu_current saat startup"""
+        started = time.monotonic()
+        # ONU yang pindah OLT masih punya row lama, urutkan agar row terbaru yang menang
+        rows = db.fetchall(f"SELECT {CACHE_COLUMNS} FROM onu_current ORDER BY updated_at")
+        self._apply_rows(rows)
+        logger.info(f"Warm load cache: {len(rows)} ONU dalam {time.monotonic() - started:.2f} detik")
+        return len(rows)
+
+    def refresh(self, db):
+        """Ambil ONU yang di-update collector sejak refresh terakhir"""
+        row = db.fetchone("SELECT MAX(updated_at) AS max_updated FROM onu_current")
+        max_updated = row['max_updated'] if row else None
+        if max_updated is None or (self.last_updated is not None and max_updated < self.last_updated):
+            return 0
+
+        if self.last_updated is None:
+            return self.warm_load(db)
+
+        # >= karena snapshot dengan detik yang sama bisa baru commit setelah refresh sebelumnya
+        rows = db.fetchall(f"""
+            SELECT {CACHE_COLUMNS}
+            FROM onu_current
+            WHERE updated_at >= %s
+            ORDER BY updated_at
+        """, (self.last_updated,))
+        self._apply_rows(rows)
+
+        logger.info(f"Refresh cache: {len(rows)} ONU, last_updated={self.last_updated}")
+        return len(rows)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'last_updated': str(self.last_updated),
+            }
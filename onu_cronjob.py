@@ -1,11 +1,19 @@
 import time
-import requests, base64, logging, re
+import signal
+import random
+import argparse
+import threading
+import logging, re
 from typing import Dict, Any
+from itertools import islice
 import pymysql as mysql
-import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from log_setup import setup_logging
+from db_pool import get_pool
+from olt_client import get_client
+from metrics import counter, gauge, histogram, write_textfile, start_http_server
 
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ONUCollector")
 
 # ---------------- DB CONFIG ----------------
@@ -17,17 +25,53 @@ DB_CONFIG = {
     "autocommit": True
 }
 
+# ---------------- COLLECTOR CONFIG ----------------
+COLLECTOR_WORKERS = 8   # jumlah OLT yang di-poll bersamaan
+OLT_DEADLINE = 60       # detik, batas total satu OLT (login s/d onutable)
+INSERT_CHUNK_SIZE = 500 # row per multi-row INSERT onu_log
+DB_POOL_SIZE = COLLECTOR_WORKERS + 1    # thread utama + satu per worker (mode stream)
+
+# Mode stream: /onutable di-parse bertahap (ijson, lihat olt_client.HAS_IJSON)
+# dan record ONU langsung di-insert per chunk dari worker thread, sehingga
+# memori puncak per OLT tidak bergantung jumlah ONU
+STREAM_ONUTABLE = True
+
+# Job cron tidak punya endpoint HTTP: metric siklus terakhir ditulis ke file
+# untuk textfile collector node_exporter (None = nonaktif)
+METRICS_TEXTFILE = None     # contoh: "/var/lib/node_exporter/textfile/olt_collector.prom"
+
+CYCLE_SECONDS = histogram("olt_collector_cycle_seconds", "Durasi satu siklus collector semua OLT")
+STEP_SECONDS = histogram("olt_collector_step_seconds", "Durasi fetch / insert onu_log per OLT", ("olt", "step"))
+ROWS_INSERTED = counter("olt_collector_rows_inserted_total", "Row onu_log yang di-insert", ("olt",))
+OLT_ERRORS = counter("olt_collector_errors_total", "OLT yang gagal di-collect", ("olt",))
+
+# ---------------- DAEMON CONFIG ----------------
+# Mode daemon (--daemon): tiap OLT punya jadwal sendiri. Interval dipercepat
+# selama OLT ada alarm (olt_logs baru atau jumlah ONU offline naik), dan
+# mundur eksponensial + jitter selama OLT tidak bisa dihubungi.
+POLL_INTERVAL = 300         # detik, interval normal per OLT
+ALARM_POLL_INTERVAL = 60    # detik, interval selama alarm aktif
+ALARM_WINDOW = 600          # detik, olt_logs dalam jendela ini dianggap alarm aktif
+ALARM_REFRESH = 30          # detik, jeda query ulang alarm dari olt_logs
+BACKOFF_MAX = 1800          # detik, batas backoff OLT yang gagal
+BACKOFF_JITTER = 0.2        # +/- 20% agar OLT yang gagal tidak sinkron
+DAEMON_METRICS_PORT = 9109  # endpoint /metrics mode daemon (None = nonaktif)
+
+OLT_INTERVAL = gauge("olt_collector_poll_interval_seconds", "Interval poll berikutnya per OLT", ("olt",))
+
+# ---------------- DELTA CONFIG ----------------
+# Mode delta: row onu_log hanya ditulis jika status/auth_state berubah, RX/RTT
+# bergeser melewati threshold, atau sudah DELTA_KEYFRAME_INTERVAL sejak row
+# terakhir MAC tersebut. Nilai terakhir yang ditulis disimpan di onu_log_state.
+DELTA_MODE = False
+DELTA_RX_THRESHOLD = 1.0        # dBm
+DELTA_RTT_THRESHOLD = 5.0
+DELTA_KEYFRAME_INTERVAL = 3600  # detik
+
 # ---------------- HELPER ----------------
 def validate_ip(ip: str) -> bool:
     return bool(re.match(r'^\d{1,3}(\.\d{1,3}){3}$', ip)) and all(0 <= int(p) <= 255 for p in ip.split('.'))
 
-def safe_json(resp: requests.Response) -> Dict[str, Any]:
-    try:
-        if resp.status_code != 200:
-            return {"error": f"HTTP {resp.status_code}", "text": resp.text[:200]}
-        return resp.json()
-    except Exception as e:
-        return {"error": str(e), "raw": resp.text[:200]}
 def safe_float(val):
     try:
         if val in [None, "", "N/A", "null", "-inf", "inf", "+inf"]:
@@ -40,124 +84,535 @@ def safe_float(val):
         return None
 
 
+def count_offline(onus):
+    return sum(1 for onu in onus if str(onu.get("status") or "").lower() != "online")
+
+
 # ---------------- OLT ----------------
-def olt_login(olt_ip: str, username: str, password: str) -> Dict[str, Any]:
-    # password di-encode base64
-    password_b64 = base64.b64encode(password.encode()).decode()
-
-    # key = md5(username:password)
-    raw_key = f"{username}:{password}"
-    key = hashlib.md5(raw_key.encode()).hexdigest()
-
-    login_url = f"http://{olt_ip}/userlogin?form=login"
-    payload = {
-        "method": "set",
-        "param": {
-            "name": username,
-            "key": key,
-            "value": password_b64,
-            "captcha_v": "",
-            "captcha_f": ""
-        }
-    }
-
-    resp = requests.post(login_url, json=payload, timeout=10)
-    data = safe_json(resp)
-
-    if data.get("code") != 1:
-        raise Exception(f"Login failed: {data}")
-    x_token = resp.headers.get("X-Token")
-    if not x_token:
-        raise Exception("No X-Token in login response")
-
-    return {"headers": {"X-Token": x_token}, "login_data": data}
-
-
-def olt_get_data(olt_ip: str, username: str, password: str):
-    auth_data = olt_login(olt_ip, username, password)
-    headers = auth_data["headers"]
-
-    # --- system hostname ---
-    try:
-        system_url = f"http://{olt_ip}/system?form=hostname"
-        system_resp = requests.get(system_url, headers=headers, timeout=10)
-        hostname = safe_json(system_resp).get("data", {}).get("hostname", olt_ip)
-    except Exception:
-        hostname = olt_ip
+def snapshot_hostname(snapshot, olt_ip):
+    system_data = snapshot["system"].get("data") or {}
+    return system_data.get("hostname", olt_ip) if isinstance(system_data, dict) else olt_ip
 
-    # --- board info + trigger onu_allow_list ---
+
+def olt_get_data(olt_ip: str, username: str, password: str, deadline: float = None, timings: Dict[str, float] = None):
+    # session keep-alive + X-Token dipakai ulang, login hanya jika belum ada token
+    client = get_client(olt_ip, username, password)
+    snapshot = client.fetch_snapshot(deadline=deadline, timings=timings)
+    hostname = snapshot_hostname(snapshot, olt_ip)
+
+    onu_data = snapshot["onutable"]
+    if "error" in onu_data:
+        raise Exception(f"onutable: {onu_data['error']}")
+
+    return hostname, onu_data.get("data", [])
+
+
+def olt_stream_data(olt_ip: str, username: str, password: str, deadline: float = None, timings: Dict[str, float] = None):
+    """Seperti olt_get_data, tapi ONU dikembalikan sebagai iterator stream /onutable"""
+    client = get_client(olt_ip, username, password)
+    snapshot = client.fetch_snapshot(deadline=deadline, timings=timings, include_onutable=False)
+    return snapshot_hostname(snapshot, olt_ip), client.iter_onutable(deadline=deadline, timings=timings)
+
+
+# ---------------- COLLECTOR ----------------
+def stream_olt(olt: Dict[str, Any], result: Dict[str, Any], deadline: float):
+    """Stream /onutable satu OLT langsung ke insert_onu_snapshot dengan koneksi pool sendiri"""
+    result["hostname"], onus = olt_stream_data(
+        olt["ip"], olt["username"], olt["password"],
+        deadline=deadline,
+        timings=result["timings"]
+    )
+    stats = {"count": 0, "offline": 0}
+    started = time.monotonic()
+    with get_pool(DB_CONFIG, size=DB_POOL_SIZE).connection() as conn:
+        result["inserted"] = insert_onu_snapshot(conn, olt["id"], olt["ip"], result["hostname"], onus, stats=stats)
+    result["onu_count"], result["offline"] = stats["count"], stats["offline"]
+    # termasuk waktu baca body /onutable yang di-stream
+    result["timings"]["insert"] = time.monotonic() - started
+    result["stored"] = True
+
+
+def fetch_olt(olt: Dict[str, Any], stream: bool = False) -> Dict[str, Any]:
+    """
+    Ambil data satu OLT (jalan di worker thread), hasil berisi timing per step.
+    stream=True: ONU tidak disimpan di result["onus"], langsung di-insert dari worker.
+    """
+    started = time.monotonic()
+    result = {"olt": olt, "hostname": olt["ip"], "onus": [], "onu_count": 0, "offline": 0,
+              "timings": {}, "error": None}
     try:
-        board_url = f"http://{olt_ip}/board?info=pon"
-        board_resp = requests.get(board_url, headers=headers, timeout=10)
-        board_data = safe_json(board_resp)
-        if "data" in board_data:
-            for port in board_data["data"]:
-                try:
-                    ts = int(time.time() * 1000)
-                    allow_url = f"http://{olt_ip}/onu_allow_list?t={ts}"
-                    requests.get(allow_url, headers=headers, timeout=5)
-                except:
-                    continue
+        logger.info(f"Collecting ONU data from {olt['ip']} ...")
+        if stream:
+            stream_olt(olt, result, deadline=started + OLT_DEADLINE)
+        else:
+            result["hostname"], result["onus"] = olt_get_data(
+                olt["ip"], olt["username"], olt["password"],
+                deadline=started + OLT_DEADLINE,
+                timings=result["timings"]
+            )
+            result["onu_count"], result["offline"] = len(result["onus"]), count_offline(result["onus"])
+    except mysql.MySQLError as e:
+        result["error"] = f"insert: {e}"
     except Exception as e:
-        logger.warning(f"Failed to get board info from {olt_ip}: {e}")
+        result["error"] = str(e)
+    result["timings"]["fetch"] = time.monotonic() - started
+    return result
 
-    # --- fetch onu table ---
-    onu_url = f"http://{olt_ip}/onutable"
-    onu_resp = requests.get(onu_url, headers=headers, timeout=15)
-    onu_data = safe_json(onu_resp)
 
-    return hostname, onu_data.get("data", [])
+# Placeholder murni %s agar executemany pymysql menggabungkan jadi multi-row INSERT
+INSERT_ONU_LOG_SQL = """
+    INSERT INTO onu_log (
+        olt_id, olt_ip, olt_hostname,
+        onu_id, onu_name, macaddr, port_id,
+        status, receive_power, rtt,
+        auth_state, vendor,
+        last_down_reason, last_down_time, register_time,
+        created_at
+    ) VALUES (
+        %s,%s,%s,
+        %s,%s,%s,%s,
+        %s,%s,%s,
+        %s,%s,
+        %s,%s,%s,
+        %s
+    )
+"""
+
+
+# State terkini per ONU, nama kosong / RX null tidak menimpa nilai terakhir
+UPSERT_ONU_CURRENT_SQL = """
+    INSERT INTO onu_current (
+        olt_id, macaddr, olt_ip, olt_hostname,
+        onu_id, onu_name, port_id,
+        status, receive_power, last_receive_power, rtt,
+        auth_state, vendor,
+        last_down_reason, last_down_time, register_time,
+        updated_at
+    ) VALUES (
+        %s,%s,%s,%s,
+        %s,%s,%s,
+        %s,%s,%s,%s,
+        %s,%s,
+        %s,%s,%s,
+        %s
+    ) ON DUPLICATE KEY UPDATE
+        olt_ip = VALUES(olt_ip),
+        olt_hostname = VALUES(olt_hostname),
+        onu_id = VALUES(onu_id),
+        onu_name = IF(VALUES(onu_name) IS NULL OR VALUES(onu_name) = '', onu_name, VALUES(onu_name)),
+        port_id = VALUES(port_id),
+        status = VALUES(status),
+        receive_power = VALUES(receive_power),
+        last_receive_power = COALESCE(VALUES(receive_power), last_receive_power),
+        rtt = VALUES(rtt),
+        auth_state = VALUES(auth_state),
+        vendor = VALUES(vendor),
+        last_down_reason = VALUES(last_down_reason),
+        last_down_time = VALUES(last_down_time),
+        register_time = VALUES(register_time),
+        updated_at = VALUES(updated_at)
+"""
+
+UPSERT_ONU_STATE_SQL = """
+    INSERT INTO onu_log_state (
+        olt_id, macaddr, status, auth_state, receive_power, rtt, written_at
+    ) VALUES (
+        %s,%s,%s,%s,%s,%s,%s
+    ) ON DUPLICATE KEY UPDATE
+        status = VALUES(status),
+        auth_state = VALUES(auth_state),
+        receive_power = VALUES(receive_power),
+        rtt = VALUES(rtt),
+        written_at = VALUES(written_at)
+"""
+
+
+def value_moved(old, new, threshold):
+    if old is None or new is None:
+        return (old is None) != (new is None)
+    return abs(float(new) - float(old)) >= threshold
+
+
+def onu_changed(prev, onu, created_at):
+    """Bandingkan ONU dengan state terakhir yang ditulis ke onu_log"""
+    status, auth_state, receive_power, rtt, written_at = prev
+    if (created_at - written_at).total_seconds() >= DELTA_KEYFRAME_INTERVAL:
+        return True
+    if str(onu.get("status")) != str(status) or str(onu.get("auth_state")) != str(auth_state):
+        return True
+    return (value_moved(receive_power, safe_float(onu.get("receive_power")), DELTA_RX_THRESHOLD)
+            or value_moved(rtt, safe_float(onu.get("rtt")), DELTA_RTT_THRESHOLD))
+
+
+def load_last_state(cur, olt_id):
+    """Mode delta: state terakhir yang ditulis ke onu_log per MAC"""
+    cur.execute("""
+        SELECT macaddr, status, auth_state, receive_power, rtt, written_at
+        FROM onu_log_state
+        WHERE olt_id = %s
+    """, (olt_id,))
+    return {row[0]: row[1:] for row in cur.fetchall()}
+
+
+def select_changed_onus(last_state, onus, created_at):
+    """Mode delta: ambil hanya ONU yang perlu ditulis ke onu_log"""
+    changed = []
+    for onu in onus:
+        prev = last_state.get(onu.get("macaddr"))
+        if prev is None or onu_changed(prev, onu, created_at):
+            changed.append(onu)
+    return changed
+
+
+def iter_chunks(items, chunk_size):
+    """Potong list atau iterator menjadi list berukuran chunk_size"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def insert_onu_snapshot(conn, olt_id, ip, olt_hostname, onus, chunk_size=INSERT_CHUNK_SIZE, stats=None):
+    """
+    Insert snapshot satu OLT ke onu_log + upsert onu_current dalam satu transaksi.
+    `onus` boleh list atau iterator (stream /onutable), diproses per chunk sehingga
+    hanya satu chunk yang ada di memori. stats (opsional) diisi count/offline.
+    """
+    if not onus:
+        return 0
+
+    with conn.cursor() as cur:
+        # satu timestamp DB untuk seluruh snapshot
+        cur.execute("SELECT NOW()")
+        created_at = cur.fetchone()[0]
+
+    inserted = 0
+    conn.begin()
+    try:
+        with conn.cursor() as cur:
+            last_state = load_last_state(cur, olt_id) if DELTA_MODE else None
+
+            for chunk in iter_chunks(onus, chunk_size):
+                if stats is not None:
+                    stats["count"] += len(chunk)
+                    stats["offline"] += count_offline(chunk)
+
+                cur.executemany(UPSERT_ONU_CURRENT_SQL, [(
+                    olt_id, onu.get("macaddr"), ip, olt_hostname,
+                    onu.get("onu_id"), onu.get("onu_name"), onu.get("port_id"),
+                    onu.get("status"), safe_float(onu.get("receive_power")), safe_float(onu.get("receive_power")),
+                    onu.get("rtt"),
+                    onu.get("auth_state"), onu.get("vendor"),
+                    onu.get("last_down_reason"), onu.get("last_down_time"), onu.get("register_time"),
+                    created_at
+                ) for onu in chunk])
+
+                if DELTA_MODE:
+                    chunk = select_changed_onus(last_state, chunk, created_at)
+                    if not chunk:
+                        continue
+
+                cur.executemany(INSERT_ONU_LOG_SQL, [(
+                    olt_id, ip, olt_hostname,
+                    onu.get("onu_id"), onu.get("onu_name"), onu.get("macaddr"), onu.get("port_id"),
+                    onu.get("status"), safe_float(onu.get("receive_power")), onu.get("rtt"),
+                    onu.get("auth_state"), onu.get("vendor"),
+                    onu.get("last_down_reason"), onu.get("last_down_time"), onu.get("register_time"),
+                    created_at
+                ) for onu in chunk])
+                inserted += len(chunk)
+
+                if DELTA_MODE:
+                    cur.executemany(UPSERT_ONU_STATE_SQL, [(
+                        olt_id, onu.get("macaddr"), onu.get("status"), onu.get("auth_state"),
+                        safe_float(onu.get("receive_power")), safe_float(onu.get("rtt")), created_at
+                    ) for onu in chunk])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted
+
+
+def log_timing_report(results, cycle_time):
+    logger.info(f"Cycle selesai dalam {cycle_time:.2f}s untuk {len(results)} OLT ({COLLECTOR_WORKERS} worker)")
+    insert_time = sum(r["timings"].get("insert", 0) for r in results)
+    total_rows = sum(r.get("inserted", 0) for r in results)
+    total_onus = sum(r["onu_count"] for r in results if not r["error"])
+    if insert_time:
+        logger.info(f"Insert onu_log: {total_rows}/{total_onus} rows, {total_rows / insert_time:.0f} rows/s")
+    for result in sorted(results, key=lambda r: r["timings"].get("fetch", 0), reverse=True):
+        steps = " ".join(f"{k}={v:.2f}s" for k, v in result["timings"].items())
+        status = f"ERROR {result['error']}" if result["error"] else f"{result['onu_count']} ONU"
+        logger.info(f"  {result['olt']['ip']}: {status} | {steps}")
+
+
+def record_metrics(results, cycle_time=None):
+    if cycle_time is not None:
+        CYCLE_SECONDS.observe(cycle_time)
+    for result in results:
+        ip = result["olt"]["ip"]
+        for step in ("fetch", "insert"):
+            if step in result["timings"]:
+                STEP_SECONDS.observe(result["timings"][step], olt=ip, step=step)
+        ROWS_INSERTED.inc(result.get("inserted", 0), olt=ip)
+        if result["error"]:
+            OLT_ERRORS.inc(olt=ip)
+
+
+def store_result(conn, result):
+    """Insert hasil fetch satu OLT, error insert dicatat di result"""
+    olt, ip = result["olt"], result["olt"]["ip"]
+
+    if result["error"]:
+        logger.error(f"Failed to collect from {ip}: {result['error']}")
+        return
+
+    logger.info(f"OLT {result['hostname']} has {result['onu_count']} ONUs")
+    if result.get("stored"):
+        # mode stream: sudah di-insert oleh worker
+        logger.info(f"Inserted {result['inserted']}/{result['onu_count']} rows from {ip} (stream) in {result['timings']['insert']:.2f}s")
+        return
+
+    started = time.monotonic()
+    try:
+        inserted = insert_onu_snapshot(conn, olt["id"], ip, result["hostname"], result["onus"])
+        elapsed = time.monotonic() - started
+        result["inserted"] = inserted
+        logger.info(f"Inserted {inserted}/{len(result['onus'])} rows from {ip} in {elapsed:.2f}s ({inserted / elapsed if elapsed else 0:.0f} rows/s)")
+    except Exception as e:
+        result["error"] = f"insert: {e}"
+        logger.error(f"Failed to store data from {ip}: {e}")
+    result["timings"]["insert"] = time.monotonic() - started
 
 
 # ---------------- MAIN ----------------
-def main():
-    conn = mysql.connect(**DB_CONFIG)
+def collect_all(conn):
     cur = conn.cursor(mysql.cursors.DictCursor)
 
     # Ambil daftar OLT dari tabel olt
     cur.execute("SELECT id, ip, username, password FROM olt ORDER BY id ASC")
     olts = cur.fetchall()
 
-    for olt in olts:
-        olt_id, ip, user, pwd = olt["id"], olt["ip"], olt["username"], olt["password"]
-        logger.info(f"Collecting ONU data from {ip} ...")
-        try:
-            olt_hostname, onus = olt_get_data(ip, user, pwd)
-            logger.info(f"OLT {olt_hostname} has {len(onus)} ONUs")
-
-            for onu in onus:
-                cur.execute("""
-                    INSERT INTO onu_log (
-                        olt_id, olt_ip, olt_hostname,
-                        onu_id, onu_name, macaddr, port_id,
-                        status, receive_power, rtt,
-                        auth_state, vendor,
-                        last_down_reason, last_down_time, register_time,
-                        created_at
-                    ) VALUES (
-                        %s,%s,%s,
-                        %s,%s,%s,%s,
-                        %s,%s,%s,
-                        %s,%s,
-                        %s,%s,%s,
-                        NOW()
-                    )
-                """, (
-                    olt_id, ip, olt_hostname,
-                    onu.get("onu_id"), onu.get("onu_name"), onu.get("macaddr"), onu.get("port_id"),
-                    onu.get("status"), safe_float(onu.get("receive_power")), onu.get("rtt"),
-                    onu.get("auth_state"), onu.get("vendor"),
-                    onu.get("last_down_reason"), onu.get("last_down_time"), onu.get("register_time")
-                ))
+    cycle_started = time.monotonic()
+    results = []
+
+    # Fetch HTTP paralel per OLT, insert DB tetap di thread utama (satu koneksi)
+    with ThreadPoolExecutor(max_workers=COLLECTOR_WORKERS) as executor:
+        futures = [executor.submit(fetch_olt, olt, STREAM_ONUTABLE) for olt in olts]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            store_result(conn, result)
+
+    cycle_time = time.monotonic() - cycle_started
+    log_timing_report(results, cycle_time)
+    record_metrics(results, cycle_time)
+    cur.close()
+
+
+# ---------------- DAEMON ----------------
+def jittered(seconds, jitter=BACKOFF_JITTER):
+    return seconds * random.uniform(1 - jitter, 1 + jitter)
+
 
-            conn.commit()
+class OltSchedule:
+    """Jadwal poll satu OLT"""
 
+    def __init__(self, olt, next_due):
+        self.olt = olt
+        self.next_due = next_due
+        self.interval = POLL_INTERVAL
+        self.failures = 0
+        self.offline = None         # jumlah ONU offline pada poll terakhir
+        self.running = False
+        self.removed = False        # dihapus dari tabel olt saat poll masih jalan
+
+
+class CollectorDaemon:
+    """
+    Scheduler collector jangka panjang: fetch HTTP di worker thread,
+    insert DB di thread utama. Poll OLT yang sama tidak pernah tumpang
+    tindih karena jadwal berikutnya baru dihitung setelah poll selesai.
+    SIGHUP memuat ulang tabel olt, SIGTERM/SIGINT menghentikan daemon.
+    """
+
+    def __init__(self, pool, workers=COLLECTOR_WORKERS):
+        self.pool = pool
+        self.workers = workers
+        self.schedules = {}         # olt_id -> OltSchedule
+        self.alarms = {}            # ip -> jumlah olt_logs dalam ALARM_WINDOW
+        self._alarms_at = 0
+        self._reload = True
+        self._stop = False
+        self._wakeup = threading.Event()     # dibangunkan oleh SIGHUP/SIGTERM saat idle
+
+    # ---------------- SIGNAL ----------------
+    def install_signals(self):
+        signal.signal(signal.SIGHUP, lambda *_: self.request_reload())
+        signal.signal(signal.SIGTERM, lambda *_: self.request_stop())
+        signal.signal(signal.SIGINT, lambda *_: self.request_stop())
+
+    def request_reload(self):
+        self._reload = True
+        self._wakeup.set()
+
+    def request_stop(self):
+        self._stop = True
+        self._wakeup.set()
+
+    # ---------------- TABEL OLT ----------------
+    def load_olts(self):
+        """Sinkronkan jadwal dengan tabel olt: OLT baru, dihapus, atau kredensial berubah"""
+        with self.pool.connection() as conn:
+            with conn.cursor(mysql.cursors.DictCursor) as cur:
+                cur.execute("SELECT id, ip, username, password FROM olt ORDER BY id ASC")
+                olts = {olt["id"]: olt for olt in cur.fetchall()}
+
+        now = time.monotonic()
+        for olt_id in list(self.schedules):
+            if olt_id not in olts:
+                schedule = self.schedules.pop(olt_id)
+                schedule.removed = True
+                logger.info(f"OLT {schedule.olt['ip']} dihapus dari jadwal")
+
+        for olt_id, olt in olts.items():
+            schedule = self.schedules.get(olt_id)
+            if schedule is None:
+                # OLT baru disebar acak dalam satu interval agar tidak poll serentak
+                self.schedules[olt_id] = OltSchedule(olt, now + random.uniform(0, min(POLL_INTERVAL, 30 * len(olts))))
+                logger.info(f"OLT {olt['ip']} ditambahkan ke jadwal")
+            elif schedule.olt != olt:
+                schedule.olt = olt
+                schedule.failures = 0
+                schedule.next_due = min(schedule.next_due, now)
+                logger.info(f"OLT {olt['ip']} berubah, poll ulang segera")
+        logger.info(f"Jadwal dimuat: {len(self.schedules)} OLT")
+
+    # ---------------- ALARM ----------------
+    def refresh_alarms(self, force=False):
+        """
+        Jumlah olt_logs terbaru per IP OLT (hostname olt_logs = 'ip nama').
+        log_time memakai idx_log_time, created_at (kunci partisi) agar schema
+        berpartisi hanya membaca partisi terbaru.
+        """
+        now = time.monotonic()
+        if not force and now - self._alarms_at < ALARM_REFRESH:
+            return
+        self._alarms_at = now
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT SUBSTRING_INDEX(hostname, ' ', 1) AS ip, COUNT(*)
+                        FROM olt_logs
+                        WHERE log_time >= NOW() - INTERVAL %s SECOND
+                          AND created_at >= NOW() - INTERVAL %s SECOND
+                        GROUP BY ip
+                    """, (ALARM_WINDOW, ALARM_WINDOW))
+                    self.alarms = dict(cur.fetchall())
         except Exception as e:
-            logger.error(f"Failed to collect from {ip}: {e}")
+            logger.warning(f"Gagal membaca alarm dari olt_logs: {e}")
 
+    def alarm_active(self, schedule, offline):
+        if self.alarms.get(schedule.olt["ip"]):
+            return True
+        return None not in (schedule.offline, offline) and offline > schedule.offline
 
-    cur.close()
-    conn.close()
+    # ---------------- POLL ----------------
+    def finish(self, schedule, result):
+        """Simpan hasil poll lalu hitung jadwal berikutnya"""
+        schedule.running = False
+        if schedule.removed:
+            return
+
+        # error insert (mode stream) bukan berarti OLT tidak bisa dihubungi
+        unreachable = bool(result["error"]) and not result["error"].startswith("insert:")
+        if result["error"]:
+            logger.error(f"Failed to collect from {schedule.olt['ip']}: {result['error']}")
+        else:
+            try:
+                with self.pool.connection() as conn:
+                    store_result(conn, result)
+            except Exception as e:
+                result["error"] = f"db: {e}"
+                logger.error(f"Koneksi DB gagal untuk {schedule.olt['ip']}: {e}")
+        record_metrics([result])
+
+        if unreachable:
+            # OLT tidak bisa dihubungi: backoff eksponensial + jitter
+            schedule.failures += 1
+            schedule.interval = jittered(min(POLL_INTERVAL * 2 ** (schedule.failures - 1), BACKOFF_MAX))
+        else:
+            if schedule.failures:
+                logger.info(f"OLT {schedule.olt['ip']} kembali bisa dihubungi")
+            schedule.failures = 0
+            # insert gagal di tengah stream: jumlah offline tidak lengkap, pakai nilai lama
+            offline = schedule.offline if result["error"] else result["offline"]
+            self.refresh_alarms()
+            schedule.interval = ALARM_POLL_INTERVAL if self.alarm_active(schedule, offline) else POLL_INTERVAL
+            schedule.offline = offline
+
+        schedule.next_due = time.monotonic() + schedule.interval
+        OLT_INTERVAL.set(schedule.interval, olt=schedule.olt["ip"])
+        logger.info(f"Poll berikutnya {schedule.olt['ip']} dalam {schedule.interval:.0f}s")
+
+    def run(self):
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while not self._stop:
+                if self._reload:
+                    self._reload = False
+                    try:
+                        self.load_olts()
+                        self.refresh_alarms(force=True)
+                    except Exception as e:
+                        logger.error(f"Gagal memuat tabel olt: {e}")
+
+                now = time.monotonic()
+                for schedule in self.schedules.values():
+                    if not schedule.running and schedule.next_due <= now:
+                        schedule.running = True
+                        futures[executor.submit(fetch_olt, dict(schedule.olt), STREAM_ONUTABLE)] = schedule
+
+                idle = [s.next_due for s in self.schedules.values() if not s.running]
+                timeout = max(0.0, min(idle) - now) if idle else POLL_INTERVAL
+                # bangun minimal tiap detik agar sinyal cepat diproses
+                if not futures:
+                    # wait() langsung return untuk set kosong, tidur sampai jadwal/sinyal berikutnya
+                    self._wakeup.wait(min(timeout, 1.0))
+                    self._wakeup.clear()
+                    continue
+                done, _ = wait(futures, timeout=min(timeout, 1.0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    schedule = futures.pop(future)
+                    self.finish(schedule, future.result())
+
+            logger.info(f"Daemon berhenti, menunggu {len(futures)} poll yang masih berjalan")
+            for future in as_completed(futures):
+                self.finish(futures[future], future.result())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collector snapshot ONU dari semua OLT")
+    parser.add_argument("--daemon", action="store_true", help="jalan terus dengan jadwal poll per OLT")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.daemon:
+        if DAEMON_METRICS_PORT:
+            start_http_server(DAEMON_METRICS_PORT)
+        daemon = CollectorDaemon(get_pool(DB_CONFIG, size=DB_POOL_SIZE))
+        daemon.install_signals()
+        daemon.run()
+        return
+
+    with get_pool(DB_CONFIG, size=DB_POOL_SIZE).connection() as conn:
+        collect_all(conn)
+    if METRICS_TEXTFILE:
+        write_textfile(METRICS_TEXTFILE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+import logging
+import argparse
+from datetime import datetime, timedelta
+from log_setup import setup_logging
+from db_pool import get_pool
+
+# ---------------- LOGGING ----------------
+logger = logging.getLogger("PartitionMaintenance")
+
+# ---------------- DB CONFIG ----------------
+DB_CONFIG = {
+    "host": "127.0.0.1",
+    "user": "",
+    "password": "",
+    "database": "db_mng_olt",
+    "autocommit": True
+}
+
+# ---------------- SETTING ----------------
+# Tabel dipartisi RANGE COLUMNS(created_at), satu partisi per hari/bulan
+# ditambah partisi pmax (MAXVALUE) yang di-REORGANIZE saat partisi baru dibuat.
+PARTITION_TABLES = {
+    "onu_log": "day",
+    "olt_logs": "month",
+}
+PARTITIONS_AHEAD = 7    # jumlah periode ke depan yang disiapkan
+
+
+# ---------------- HELPER ----------------
+def period_floor(dt, period):
+    if period == "month":
+        return datetime(dt.year, dt.month, 1)
+    return datetime(dt.year, dt.month, dt.day)
+
+
+def next_period(dt, period):
+    if period == "month":
+        return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+    return dt + timedelta(days=1)
+
+
+def partition_name(start, period):
+    """Nama partisi dari awal periode: p20260102 (harian) / p202601 (bulanan)"""
+    return "p" + start.strftime("%Y%m" if period == "month" else "%Y%m%d")
+
+
+def partition_definition(start, period):
+    bound = next_period(start, period)
+    return f"PARTITION {partition_name(start, period)} VALUES LESS THAN ('{bound:%Y-%m-%d %H:%M:%S}')"
+
+
+def parse_partition_bound(description):
+    """Batas atas partisi RANGE COLUMNS(created_at), contoh: '2026-01-02 00:00:00'"""
+    if not description or description == "MAXVALUE":
+        return None
+    value = description.strip("'")
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def get_partitions(cur, table):
+    """List (nama, batas atas) partisi tabel, batas None untuk MAXVALUE"""
+    cur.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = %s
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [(name, parse_partition_bound(description)) for name, description in cur.fetchall()]
+
+
+# ---------------- MAINTENANCE ----------------
+def add_future_partitions(conn, table, period, ahead=PARTITIONS_AHEAD, since=None):
+    """Pecah pmax jadi partisi per periode sampai `ahead` periode ke depan"""
+    cur = conn.cursor()
+
+    try:
+        partitions = get_partitions(cur, table)
+        if not partitions:
+            raise Exception(f"Tabel {table} belum dipartisi")
+        if partitions[-1][1] is not None:
+            raise Exception(f"Tabel {table} tidak punya partisi pmax (MAXVALUE)")
+
+        bounds = [bound for _, bound in partitions if bound is not None]
+        cur.execute("SELECT NOW()")
+        now = cur.fetchone()[0]
+
+        if bounds:
+            start = bounds[-1]
+        else:
+            start = period_floor(since or now, period)
+
+        until = period_floor(now, period)
+        for _ in range(ahead):
+            until = next_period(until, period)
+
+        definitions = []
+        while start < until:
+            definitions.append(partition_definition(start, period))
+            start = next_period(start, period)
+
+        if not definitions:
+            logger.info(f"[{table}] Partisi sudah tersedia sampai {bounds[-1]}")
+            return 0
+
+        definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+        cur.execute(f"""
+            ALTER TABLE {table}
+            REORGANIZE PARTITION pmax INTO (
+                {', '.join(definitions)}
+            )
+        """)
+        logger.info(f"[{table}] {len(definitions) - 1} partisi baru dibuat, sampai {until:%Y-%m-%d}")
+        return len(definitions) - 1
+
+    finally:
+        cur.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Buat partisi onu_log / olt_logs ke depan")
+    parser.add_argument("--table", action="append", choices=sorted(PARTITION_TABLES),
+                        help="tabel yang diproses (default semua, bisa diulang)")
+    parser.add_argument("--ahead", type=int, default=PARTITIONS_AHEAD)
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+    for table in args.table or sorted(PARTITION_TABLES):
+        try:
+            with get_pool(DB_CONFIG, size=1).connection() as conn:
+                add_future_partitions(conn, table, PARTITION_TABLES[table], args.ahead)
+        except Exception as e:
+            logger.error(f"Gagal maintenance partisi {table}: {e}")
+
+
+if __name__ == "__main__":
+    main()
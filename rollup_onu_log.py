@@ -0,0 +1,172 @@
+import time
+import logging
+import argparse
+from log_setup import setup_logging
+from db_pool import get_pool
+
+# ---------------- LOGGING ----------------
+logger = logging.getLogger("ONURollup")
+
+# ---------------- DB CONFIG ----------------
+DB_CONFIG = {
+    "host": "127.0.0.1",
+    "user": "",
+    "password": "",
+    "database": "db_mng_olt",
+    "autocommit": True
+}
+
+# ---------------- SETTING ----------------
+# Rollup onu_log per MAC ke tabel per jam / per hari. Yang disimpan sum/count,
+# bukan rata-rata, supaya row baru bisa ditambahkan inkremental; rx_avg,
+# rtt_avg dan availability adalah generated column di tabel rollup.
+ROLLUP_TABLES = {
+    "onu_rollup_hourly": "DATE_FORMAT(created_at, '%%Y-%%m-%%d %%H:00:00')",
+    "onu_rollup_daily": "DATE(created_at)",
+}
+ROLLUP_NAME = "onu_log"         # key high-water mark di onu_rollup_state
+ONLINE_STATUS = "Online"
+
+BATCH_SIZE = 50000      # rentang id onu_log per transaksi rollup
+BATCH_SLEEP = 0.2       # detik jeda antar chunk agar insert collector tidak tertahan
+PROGRESS_EVERY = 20     # log progress tiap N chunk
+
+# Snapshot collector di-insert dalam satu transaksi, jadi id yang lebih kecil
+# bisa saja belum commit. Row hanya di-rollup sampai id row terakhir yang
+# lebih tua dari ROLLUP_LAG; nilai ini harus > 2x durasi transaksi snapshot terlama.
+ROLLUP_LAG = 600        # detik
+
+# Set-based di MySQL: GROUP BY per chunk id, hasilnya digabung ke row rollup
+# yang sudah ada. Catatan: dengan DELTA_MODE collector, onu_log hanya berisi
+# row yang berubah sehingga samples/availability menjadi per perubahan, bukan per poll.
+ROLLUP_SQL = """
+    INSERT INTO {table} (
+        olt_id, macaddr, bucket,
+        samples, online_samples,
+        rx_count, rx_sum, rx_min, rx_max,
+        rtt_count, rtt_sum, rtt_min, rtt_max
+    )
+    SELECT
+        olt_id, macaddr, {bucket} AS rollup_bucket,
+        COUNT(*), SUM(status = %s),
+        COUNT(receive_power), COALESCE(SUM(receive_power), 0), MIN(receive_power), MAX(receive_power),
+        COUNT(rtt), COALESCE(SUM(rtt), 0), MIN(rtt), MAX(rtt)
+    FROM onu_log
+    WHERE id > %s AND id <= %s
+    GROUP BY olt_id, macaddr, rollup_bucket
+    ON DUPLICATE KEY UPDATE
+        samples = samples + VALUES(samples),
+        online_samples = online_samples + VALUES(online_samples),
+        rx_count = rx_count + VALUES(rx_count),
+        rx_sum = rx_sum + VALUES(rx_sum),
+        rx_min = LEAST(COALESCE(rx_min, VALUES(rx_min)), COALESCE(VALUES(rx_min), rx_min)),
+        rx_max = GREATEST(COALESCE(rx_max, VALUES(rx_max)), COALESCE(VALUES(rx_max), rx_max)),
+        rtt_count = rtt_count + VALUES(rtt_count),
+        rtt_sum = rtt_sum + VALUES(rtt_sum),
+        rtt_min = LEAST(COALESCE(rtt_min, VALUES(rtt_min)), COALESCE(VALUES(rtt_min), rtt_min)),
+        rtt_max = GREATEST(COALESCE(rtt_max, VALUES(rtt_max)), COALESCE(VALUES(rtt_max), rtt_max))
+"""
+
+UPDATE_STATE_SQL = """
+    INSERT INTO onu_rollup_state (name, last_id, updated_at)
+    VALUES (%s, %s, NOW())
+    ON DUPLICATE KEY UPDATE
+        last_id = VALUES(last_id),
+        updated_at = VALUES(updated_at)
+"""
+
+
+# ---------------- HIGH-WATER MARK ----------------
+def get_last_id(cur):
+    cur.execute("SELECT last_id FROM onu_rollup_state WHERE name = %s", (ROLLUP_NAME,))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def get_safe_end_id(cur, last_id, lag):
+    """
+    id terbesar dari row yang lebih tua dari lag, semua id di bawahnya sudah commit.
+    Dicari mundur lewat primary key dari id terbaru, jadi hanya row dalam jendela
+    lag yang dilewati.
+    """
+    cur.execute("""
+        SELECT id
+        FROM onu_log
+        WHERE id > %s AND created_at < NOW() - INTERVAL %s SECOND
+        ORDER BY id DESC
+        LIMIT 1
+    """, (last_id, lag))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+# ---------------- ROLLUP ----------------
+def rollup(conn, batch_size=BATCH_SIZE, sleep=BATCH_SLEEP, lag=ROLLUP_LAG):
+    """Rollup onu_log baru (id > high-water mark) per chunk id, tiap chunk satu transaksi"""
+    cur = conn.cursor()
+
+    try:
+        last_id = get_last_id(cur)
+        end_id = get_safe_end_id(cur, last_id, lag)
+        if end_id is None or end_id <= last_id:
+            logger.info(f"Tidak ada onu_log baru untuk di-rollup (last_id {last_id})")
+            return {"chunks": 0, "last_id": last_id, "elapsed": 0.0}
+
+        # lewati rentang id kosong (mis. run pertama setelah cleanup)
+        cur.execute("SELECT MIN(id) FROM onu_log WHERE id > %s", (last_id,))
+        lo = max(last_id, cur.fetchone()[0] - 1)
+        start_id = lo
+        logger.info(f"Rollup onu_log id {lo + 1}..{end_id}, batch {batch_size}")
+
+        started = time.monotonic()
+        chunks = 0
+        while lo < end_id:
+            hi = min(lo + batch_size, end_id)
+            # rollup + high-water mark dalam satu transaksi: chunk tidak pernah terhitung dua kali
+            conn.begin()
+            try:
+                for table, bucket in ROLLUP_TABLES.items():
+                    cur.execute(ROLLUP_SQL.format(table=table, bucket=bucket), (ONLINE_STATUS, lo, hi))
+                cur.execute(UPDATE_STATE_SQL, (ROLLUP_NAME, hi))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            chunks += 1
+            lo = hi
+
+            if chunks % PROGRESS_EVERY == 0:
+                progress = (lo - start_id) * 100 / (end_id - start_id)
+                logger.info(f"Progress {progress:.1f}%: sampai id {lo}, {time.monotonic() - started:.1f}s")
+
+            if sleep and lo < end_id:
+                time.sleep(sleep)
+
+        elapsed = time.monotonic() - started
+        logger.info(f"Rollup selesai sampai id {end_id}, {chunks} chunk dalam {elapsed:.1f}s")
+        return {"chunks": chunks, "last_id": end_id, "elapsed": elapsed}
+    finally:
+        cur.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rollup RX/RTT onu_log per jam dan per hari")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=BATCH_SLEEP)
+    parser.add_argument("--lag", type=int, default=ROLLUP_LAG,
+                        help="detik, row yang lebih baru belum di-rollup")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+    try:
+        with get_pool(DB_CONFIG, size=1).connection() as conn:
+            rollup(conn, args.batch_size, args.sleep, args.lag)
+    except Exception as e:
+        logger.error(f"Gagal rollup onu_log: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import time
+import threading
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger("SnapshotCache")
+
+# ---------------- SETTING ----------------
+SNAPSHOT_TTL = 30       # detik hasil scrape OLT dipakai ulang
+
+
+class _Flight:
+    """Satu scrape yang sedang berjalan, ditunggu oleh request lain dengan key sama"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SnapshotCache:
+    """
+    Cache TTL thread-safe dengan single-flight: request bersamaan untuk key yang
+    sama menunggu satu loader, bukan memanggil loader masing-masing.
+    """
+
+    def __init__(self, ttl=SNAPSHOT_TTL):
+        self.ttl = ttl
+        self.stats = defaultdict(int)
+        self._entries = {}      # key -> (waktu simpan, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, fresh=False, cache_if=None):
+        """
+        Return (value, age): age None jika value baru dimuat.
+        fresh=True melewati cache, tapi tetap ikut scrape yang sedang berjalan.
+        cache_if(value) menentukan apakah hasil disimpan (mis. hanya yang sukses).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not fresh and entry and time.monotonic() - entry[0] < self.ttl:
+                self.stats["hits"] += 1
+                return entry[1], time.monotonic() - entry[0]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.stats["loads"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, None
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None and (cache_if is None or cache_if(flight.value)):
+                    self._entries[key] = (time.monotonic(), flight.value)
+            flight.event.set()
+
+        return flight.value, None
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge(self):
+        """Buang entry kedaluwarsa, return jumlah yang dihapus"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (stored, _) in self._entries.items() if now - stored >= self.ttl]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
@@ -0,0 +1,166 @@
+import re
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from metrics import histogram
+
+logger = logging.getLogger("SNMPClient")
+
+try:
+    from pysnmp.hlapi.v3arch.asyncio import (
+        SnmpEngine, CommunityData, UdpTransportTarget, ContextData,
+        ObjectType, ObjectIdentity, get_cmd
+    )
+    HAS_PYSNMP = True
+except ImportError:
+    HAS_PYSNMP = False
+
+# ---------------- SETTING ----------------
+SNMP_TIMEOUT = 5            # detik per GET
+SNMP_RETRIES = 1
+COALESCE_WINDOW = 0.05      # detik menunggu OID lain dari OLT yang sama sebelum GET
+MAX_OIDS_PER_GET = 32       # batas varbind per PDU
+PER_OLT_CONCURRENCY = 2     # GET bersamaan maksimal per OLT
+
+RX_OID = ".1.3.6.1.4.1.50224.3.3.3.1.4.{onu_id}.0.0"
+
+SNMP_GET_SECONDS = histogram("olt_snmp_get_seconds", "Durasi satu GET SNMP multi-OID", ("backend", "result"))
+
+SNMPGET_LINE = re.compile(r'^\.?([\d.]+)\s+=\s+INTEGER:\s*(-?\d+)', re.M)
+
+
+def rx_oid(onu_id):
+    return RX_OID.format(onu_id=onu_id)
+
+
+def normalize_oid(oid):
+    return oid.lstrip(".")
+
+
+class SnmpRxPoller:
+    """GET RX ONU via SNMP, permintaan per OLT digabung jadi satu GET multi-OID"""
+
+    def __init__(self, window=COALESCE_WINDOW, max_oids=MAX_OIDS_PER_GET,
+                 concurrency=PER_OLT_CONCURRENCY, timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES):
+        self.window = window
+        self.max_oids = max_oids
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.stats = defaultdict(int)
+        self._pending = {}          # (olt_ip, community) -> {oid: [future]}
+        self._flush_tasks = {}
+        self._semaphores = {}
+        self._running = set()
+        self._engine = None
+
+    async def get_rx(self, olt_ip, community, onu_id):
+        """RX ONU dalam dBm (float), None jika gagal"""
+        raw = await self.get(olt_ip, community, rx_oid(onu_id))
+        return raw / 100 if raw is not None else None
+
+    async def get(self, olt_ip, community, oid):
+        """Antrikan satu OID, hasil INTEGER atau None"""
+        key = (olt_ip, community)
+        oid = normalize_oid(oid)
+        future = asyncio.get_running_loop().create_future()
+
+        pending = self._pending.setdefault(key, {})
+        pending.setdefault(oid, []).append(future)
+        self.stats["requests"] += 1
+
+        if len(pending) >= self.max_oids:
+            self._start_flush(key)
+        elif key not in self._flush_tasks:
+            self._flush_tasks[key] = asyncio.create_task(self._flush_later(key))
+
+        return await future
+
+    async def _flush_later(self, key):
+        await asyncio.sleep(self.window)
+        self._flush_tasks.pop(key, None)
+        self._start_flush(key)
+
+    def _start_flush(self, key):
+        task = self._flush_tasks.pop(key, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.create_task(self._flush(key, batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _flush(self, key, batch):
+        olt_ip, community = key
+        semaphore = self._semaphores.setdefault(olt_ip, asyncio.Semaphore(self.concurrency))
+        oids = list(batch)
+
+        async with semaphore:
+            self.stats["gets"] += 1
+            backend = "pysnmp" if HAS_PYSNMP else "snmpget"
+            started = time.perf_counter()
+            try:
+                if HAS_PYSNMP:
+                    values = await self._get_pysnmp(olt_ip, community, oids)
+                else:
+                    values = await self._get_snmpget(olt_ip, community, oids)
+                result = "ok"
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"SNMP GET {olt_ip} ({len(oids)} OID) gagal: {e}")
+                values = {}
+                result = "error"
+            SNMP_GET_SECONDS.observe(time.perf_counter() - started, backend=backend, result=result)
+
+        for oid, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(values.get(oid))
+
+    # ---------------- BACKEND ----------------
+    async def _get_pysnmp(self, olt_ip, community, oids):
+        if self._engine is None:
+            self._engine = SnmpEngine()
+        target = await UdpTransportTarget.create((olt_ip, 161), timeout=self.timeout, retries=self.retries)
+        error_indication, error_status, _, var_binds = await get_cmd(
+            self._engine,
+            CommunityData(community, mpModel=1),
+            target,
+            ContextData(),
+            *[ObjectType(ObjectIdentity(oid)) for oid in oids]
+        )
+        if error_indication:
+            raise Exception(str(error_indication))
+        if error_status:
+            raise Exception(error_status.prettyPrint())
+
+        values = {}
+        for name, value in var_binds:
+            try:
+                values[normalize_oid(str(name))] = int(value)
+            except (TypeError, ValueError):
+                # noSuchInstance / noSuchObject
+                continue
+        return values
+
+    async def _get_snmpget(self, olt_ip, community, oids):
+        """Fallback tanpa pysnmp: satu proses snmpget untuk semua OID"""
+        process = await asyncio.create_subprocess_exec(
+            "snmpget", "-v2c", "-c", community, "-On",
+            "-t", str(self.timeout), "-r", str(self.retries),
+            olt_ip, *[f".{oid}" for oid in oids],
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(
+                process.communicate(), timeout=self.timeout * (self.retries + 1) + 1
+            )
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+
+        return {oid: int(value) for oid, value in SNMPGET_LINE.findall(stdout.decode(errors="replace"))}
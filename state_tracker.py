@@ -0,0 +1,138 @@
+import time
+import heapq
+import logging
+from collections import defaultdict, deque
+
+logger = logging.getLogger("StateTracker")
+
+# ---------------- SETTING ----------------
+MATI_LAMPU_WINDOW = 10      # detik setelah dying gasp, hanya 'link up' yang diteruskan
+FLAP_TRANSITIONS = 5        # jumlah transisi ...
+FLAP_WINDOW = 600           # ... dalam detik ini dianggap flapping, alert ditahan
+
+_MATI = 0
+_FLAP = 1
+
+
+class OnuStateTracker:
+    """
+    State per MAC untuk kategori_log: jendela mati lampu dan deteksi flapping.
+    Entry kedaluwarsa lewat satu min-heap (deadline, jenis, mac), jadi MAC yang
+    mati dan tidak pernah kembali tetap terhapus dan memori tidak terus tumbuh.
+    """
+
+    def __init__(self, window=MATI_LAMPU_WINDOW, flap_transitions=FLAP_TRANSITIONS,
+                 flap_window=FLAP_WINDOW):
+        self.window = window
+        self.flap_transitions = flap_transitions
+        self.flap_window = flap_window
+        self.stats = defaultdict(int)
+        self._mati = {}         # mac -> waktu dying gasp terakhir
+        self._flaps = {}        # mac -> deque waktu transisi (maxlen flap_transitions)
+        self._last = {}         # mac -> kategori terakhir, ulangan kategori sama bukan transisi
+        self._flapping = set()
+        self._expiry = []
+
+    def expire(self, now=None):
+        """Buang entry yang sudah lewat deadline"""
+        now = time.monotonic() if now is None else now
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            deadline, kind, mac = heapq.heappop(expiry)
+            # entry heap basi jika state MAC sudah diperbarui setelahnya
+            if kind == _MATI:
+                since = self._mati.get(mac)
+                if since is not None and since + self.window <= deadline:
+                    del self._mati[mac]
+                    self.stats["mati_expired"] += 1
+            else:
+                transitions = self._flaps.get(mac)
+                if transitions and transitions[-1] + self.flap_window <= deadline:
+                    del self._flaps[mac]
+                    self._last.pop(mac, None)
+                    self._flapping.discard(mac)
+
+    # ---------------- MATI LAMPU ----------------
+    def mark_dying_gasp(self, mac, now):
+        self._mati[mac] = now
+        heapq.heappush(self._expiry, (now + self.window, _MATI, mac))
+        self.stats["dying_gasp"] += 1
+
+    def in_mati_window(self, mac, now):
+        since = self._mati.get(mac)
+        return since is not None and now - since < self.window
+
+    def clear_mati(self, mac):
+        self._mati.pop(mac, None)
+
+    # ---------------- FLAPPING ----------------
+    def record_transition(self, mac, category, now):
+        """Catat transisi jika kategori berubah, True jika MAC sedang flapping (alert ditahan)"""
+        if self._last.get(mac) == category and mac in self._flaps:
+            if mac in self._flapping:
+                self.stats["flap_suppressed"] += 1
+                return True
+            return False
+        self._last[mac] = category
+
+        transitions = self._flaps.get(mac)
+        if transitions is None:
+            transitions = self._flaps[mac] = deque(maxlen=self.flap_transitions)
+        transitions.append(now)
+        heapq.heappush(self._expiry, (now + self.flap_window, _FLAP, mac))
+
+        flapping = (len(transitions) == self.flap_transitions
+                    and now - transitions[0] <= self.flap_window)
+        if flapping:
+            if mac not in self._flapping:
+                self._flapping.add(mac)
+                logger.info(f"MAC {mac} flapping ({self.flap_transitions} transisi dalam {self.flap_window} detik), alert ditahan")
+            self.stats["flap_suppressed"] += 1
+        elif mac in self._flapping:
+            self._flapping.discard(mac)
+            logger.info(f"MAC {mac} stabil kembali")
+        return flapping
+
+    # ---------------- CHECKPOINT ----------------
+    def snapshot(self, now=None):
+        """State dalam umur (detik) relatif ke waktu wall clock, aman untuk restart"""
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+        return {
+            "saved_at": time.time(),
+            "mati": {mac: now - since for mac, since in self._mati.items()},
+            "flaps": {mac: [now - t for t in transitions] for mac, transitions in self._flaps.items()},
+            "last": dict(self._last),
+        }
+
+    def restore(self, snapshot, now=None):
+        """Muat ulang state dari snapshot(), entry yang sudah lewat dibuang"""
+        if not snapshot:
+            return
+        now = time.monotonic() if now is None else now
+        elapsed = max(0.0, time.time() - snapshot.get("saved_at", 0))
+
+        for mac, age in snapshot.get("mati", {}).items():
+            since = now - age - elapsed
+            if now - since < self.window:
+                self.mark_dying_gasp(mac, since)
+
+        for mac, ages in snapshot.get("flaps", {}).items():
+            times = [now - age - elapsed for age in ages]
+            times = [t for t in times if now - t <= self.flap_window]
+            if times:
+                transitions = self._flaps[mac] = deque(times, maxlen=self.flap_transitions)
+                heapq.heappush(self._expiry, (transitions[-1] + self.flap_window, _FLAP, mac))
+                if mac in snapshot.get("last", {}):
+                    self._last[mac] = snapshot["last"][mac]
+
+        logger.info(f"State dipulihkan: {len(self._mati)} mati lampu, {len(self._flaps)} riwayat flap")
+
+    def counters(self):
+        return {
+            **self.stats,
+            "mati_tracked": len(self._mati),
+            "flap_tracked": len(self._flaps),
+            "flapping": len(self._flapping),
+            "heap_size": len(self._expiry),
+        }
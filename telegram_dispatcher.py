@@ -0,0 +1,202 @@
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+from collections import defaultdict
+from telegram.error import TelegramError, RetryAfter, NetworkError, ChatMigrated
+from metrics import histogram
+
+logger = logging.getLogger("TelegramDispatcher")
+
+# ---------------- SETTING ----------------
+# Batas Bot API: ~30 pesan/detik global, 1 pesan/detik per chat,
+# 20 pesan/menit per grup (chat_id negatif)
+OUTBOX_PATH = "/var/lib/olt-bot/telegram_outbox.db"
+GLOBAL_RATE = 25            # pesan/detik, sedikit di bawah batas agar aman
+GLOBAL_BURST = 25
+CHAT_RATE = 1.0
+GROUP_RATE = 20 / 60
+CHAT_BURST = 3
+RETRY_BASE = 1              # detik, backoff eksponensial untuk error jaringan
+RETRY_MAX = 300
+
+SEND_SECONDS = histogram("olt_telegram_send_seconds", "Durasi sendMessage ke Bot API", ("result",))
+
+
+class TokenBucket:
+    """Rate limiter token bucket untuk asyncio"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def retry_after_seconds(error):
+    """RetryAfter.retry_after bisa int (PTB lama) atau timedelta (PTB 22+)"""
+    delay = error.retry_after
+    if hasattr(delay, "total_seconds"):
+        delay = delay.total_seconds()
+    return float(delay)
+
+
+class TelegramDispatcher:
+    """
+    Antrian kirim Telegram persisten (SQLite): pesan per chat dikirim berurutan,
+    antar chat paralel, dibatasi token bucket global dan per chat.
+    Pesan baru dihapus dari outbox setelah terkirim, jadi tetap aman saat restart.
+    """
+
+    def __init__(self, bot, path=OUTBOX_PATH, global_rate=GLOBAL_RATE):
+        self.bot = bot
+        self.path = path
+        self.global_bucket = TokenBucket(global_rate, GLOBAL_BURST)
+        self.chat_buckets = {}
+        self.stats = defaultdict(int)
+        self.backlog = 0            # jumlah pesan di outbox, dibaca tanpa query SQLite
+        self._workers = {}
+        self._db = None
+
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id TEXT NOT NULL,
+                text TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_outbox_chat ON outbox (chat_id, id)")
+        self._db.commit()
+
+    async def start(self):
+        """Buka outbox dan lanjutkan pesan yang tertunda dari run sebelumnya"""
+        self.open()
+        pending = self._db.execute("SELECT chat_id, COUNT(*) FROM outbox GROUP BY chat_id").fetchall()
+        for chat_id, count in pending:
+            self.backlog += count
+            logger.info(f"Lanjutkan {count} pesan tertunda ke {chat_id}")
+            self._wake(chat_id)
+
+    def enqueue(self, chat_ids, text):
+        """Simpan pesan untuk tiap chat ke outbox, kirim di background"""
+        now = time.time()
+        self._db.executemany(
+            "INSERT INTO outbox (chat_id, text, created_at) VALUES (?, ?, ?)",
+            [(str(chat_id), text, now) for chat_id in chat_ids]
+        )
+        self._db.commit()
+        self.stats["queued"] += len(chat_ids)
+        self.backlog += len(chat_ids)
+        for chat_id in chat_ids:
+            self._wake(str(chat_id))
+
+    def pending(self):
+        return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    async def close(self):
+        for task in list(self._workers.values()):
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ---------------- WORKER ----------------
+    def _wake(self, chat_id):
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._chat_worker(chat_id))
+
+    def _bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = GROUP_RATE if chat_id.startswith("-") else CHAT_RATE
+            bucket = self.chat_buckets[chat_id] = TokenBucket(rate, CHAT_BURST)
+        return bucket
+
+    async def _chat_worker(self, chat_id):
+        """Kirim outbox satu chat berurutan sampai kosong"""
+        bucket = self._bucket(chat_id)
+        try:
+            while True:
+                row = self._db.execute(
+                    "SELECT id, text, attempts FROM outbox WHERE chat_id = ? ORDER BY id LIMIT 1",
+                    (chat_id,)
+                ).fetchone()
+                if row is None:
+                    return
+
+                message_id, text, attempts = row
+                await bucket.acquire()
+                await self.global_bucket.acquire()
+
+                delay = await self._send(chat_id, message_id, text, attempts)
+                if delay:
+                    await asyncio.sleep(delay)
+        finally:
+            if self._workers.get(chat_id) is asyncio.current_task():
+                del self._workers[chat_id]
+
+    async def _send(self, chat_id, message_id, text, attempts):
+        """Kirim satu pesan, return jeda sebelum percobaan berikutnya"""
+        started = time.perf_counter()
+        result = "ok"
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text)
+        except RetryAfter as e:
+            # flood control: bukan kegagalan, tunggu sesuai permintaan Telegram
+            result = "retry_after"
+            delay = retry_after_seconds(e)
+            self.stats["retry_after"] += 1
+            logger.warning(f"Flood control {chat_id}, tunggu {delay:.0f} detik")
+            return delay
+        except ChatMigrated as e:
+            result = "migrated"
+            logger.warning(f"Chat {chat_id} pindah ke {e.new_chat_id}, pesan dialihkan")
+            self._db.execute("UPDATE outbox SET chat_id = ? WHERE chat_id = ?", (str(e.new_chat_id), chat_id))
+            self._db.commit()
+            self._wake(str(e.new_chat_id))
+            return 0
+        except NetworkError as e:
+            result = "network_error"
+            attempts += 1
+            delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+            self._db.execute("UPDATE outbox SET attempts = ? WHERE id = ?", (attempts, message_id))
+            self._db.commit()
+            self.stats["retries"] += 1
+            logger.warning(f"Gagal kirim ke {chat_id} (percobaan {attempts}): {e}, ulangi dalam {delay} detik")
+            return delay
+        except TelegramError as e:
+            # BadRequest / Forbidden: tidak akan berhasil walau diulang
+            result = "failed"
+            self.stats["failed"] += 1
+            logger.error(f"Pesan ke {chat_id} dibuang: {e}")
+        else:
+            self.stats["sent"] += 1
+            logger.info("Pesan terkirim ke %s", chat_id)
+        finally:
+            SEND_SECONDS.observe(time.perf_counter() - started, result=result)
+
+        self._db.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+        self._db.commit()
+        self.backlog -= 1
+        return 0